@@ -0,0 +1,74 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+import load
+
+# Benchmark COPY vs. INSERT loading into a scratch copy of the Inspections table.
+# Point POSTGRES_HOST/POSTGRES_PORT at the compose database (localhost:5433 from the host).
+
+BENCH_TABLE = "BenchInspections"
+
+def make_inspections(num_rows, seed=0):
+    """
+    Builds a synthetic frame shaped like inspections_df in load.py.
+    """
+    rng = np.random.default_rng(seed)
+    results = np.array(['Pass', 'Fail', 'Pass W/ Conditions', 'Out Of Business', 'No Entry'])
+    types = np.array(['Canvass', 'License', 'Complaint', 'Canvass Re-Inspection'])
+    dates = pd.Timestamp('2010-01-01') + pd.to_timedelta(rng.integers(0, 5500, num_rows), unit='D')
+    return pd.DataFrame({
+        'inspection_id': np.arange(num_rows).astype(str),
+        'license_id': rng.integers(1, num_rows // 10 + 2, num_rows).astype(str),
+        'inspection_date': dates.date,
+        'inspection_type': types[rng.integers(0, len(types), num_rows)],
+        'results': results[rng.integers(0, len(results), num_rows)],
+        'violation_ids': '3|5|38',
+        'violation_text': '38. insects, rodents, & animals not present - comments: no evidence of rodent activity',
+    })
+
+def reset_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS public."{BENCH_TABLE}"'))
+        conn.execute(text(f'''
+            CREATE TABLE public."{BENCH_TABLE}"
+            (
+                inspection_id character varying NOT NULL,
+                license_id character varying,
+                inspection_date date,
+                inspection_type character varying,
+                results character varying,
+                violation_ids character varying,
+                violation_text text,
+                PRIMARY KEY (inspection_id)
+            )'''))
+
+def run(engine, df, method, chunk_size):
+    reset_table(engine)
+    start = time.perf_counter()
+    if method == 'copy':
+        load.copy_to_sql(df, BENCH_TABLE, engine, chunk_size=chunk_size)
+    else:
+        df.to_sql(BENCH_TABLE, engine, if_exists='append', index=False)
+    elapsed = time.perf_counter() - start
+    print(f"{method:>6} | {len(df):>9} rows | chunk {chunk_size:>7} | {elapsed:8.2f}s | {len(df) / elapsed:12,.0f} rows/sec")
+    return elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare COPY and INSERT load throughput.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--skip-insert', action='store_true', help="Only time COPY (INSERT is slow at large row counts).")
+    args = parser.parse_args()
+
+    engine = create_engine(load.DATABASE_URL)
+    for num_rows in args.rows:
+        df = make_inspections(num_rows)
+        if not args.skip_insert:
+            run(engine, df, 'insert', num_rows)
+        for chunk_size in args.chunk_sizes:
+            run(engine, df, 'copy', chunk_size)
+
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS public."{BENCH_TABLE}"'))
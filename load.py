@@ -1,21 +1,15 @@
-import import_ipynb
-import extract 
-import transform
 import pandas as pd
 import os
+import io
+import hashlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
-from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
 
-#get api credentials from .env
 load_dotenv()
-api_url = os.getenv("API_KEY").strip()
-
-#CALL EXTRACT & TRANSFORM
-if __name__ == "__main__":
-    data = extract.fetch_api_data(api_url, batch_size=1000, num_records=100000, restart=True)
-    df = pd.DataFrame(data)
-    df = transform.clean_all(df)
 
 # LOAD: push data to postgres
 #get database credentials from .env
@@ -26,18 +20,71 @@ DB_PORT = os.getenv("POSTGRES_PORT")
 DB_NAME = os.getenv("POSTGRES_NAME")
 DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+#load tuning: 'copy' streams rows with COPY ... FROM STDIN, 'insert' uses DataFrame.to_sql
+LOAD_METHOD = os.getenv("LOAD_METHOD", "copy")
+COPY_CHUNK_SIZE = int(os.getenv("COPY_CHUNK_SIZE", 50000))
+#number of connections used to load tables concurrently (1 loads sequentially)
+LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", 1))
+#>0 loads chunk by chunk from the cleaned frame, keeping the loader's working memory near this many MB
+LOAD_MEMORY_BUDGET_MB = int(os.getenv("LOAD_MEMORY_BUDGET_MB", 0))
+#chunks built ahead of the database writer before the builder has to wait
+LOAD_QUEUE_SIZE = int(os.getenv("LOAD_QUEUE_SIZE", 2))
+#'full' drops and reloads every table, 'incremental' merges new/changed rows through staging tables
+LOAD_MODE = os.getenv("LOAD_MODE", "full")
+
+#schema the ETL owns: every table, index and view it builds lives here, and nothing else should
+DATA_SCHEMA = os.getenv("DATA_SCHEMA", "chicago")
+#full loads build into this schema and swap it in for DATA_SCHEMA once ready ('' loads DATA_SCHEMA in place)
+SHADOW_SCHEMA = os.getenv("SHADOW_SCHEMA", "chicago_shadow")
+#'' keeps Inspections a plain table, 'year' or 'month' range-partitions it by inspection_date
+INSPECTIONS_PARTITION = os.getenv("INSPECTIONS_PARTITION", "")
+#text search configuration of Inspections.violation_search; the dashboard's search queries must use the same one
+SEARCH_CONFIG = 'english'
+
+#area ids transform.py keeps from the API's computed region columns (see COMPUTED_REGIONS there)
+AREA_COLUMNS = ['ward', 'community_area', 'census_tract', 'zip_region', 'historical_ward']
+
+#primary key each table is merged on in incremental mode
+TABLE_KEYS = {
+    'Facility': ('license_id',),
+    'Inspections': ('inspection_id',),
+    'Violations': ('violation_id',),
+    'InspectionViolations': ('inspection_id', 'violation_id'),
+}
+#columns reported back for rows an incremental merge touched, used to refresh derived tables
+MERGE_RETURNING = {'Facility': ('license_id',), 'Inspections': ('inspection_id', 'inspection_date', 'license_id')}
+if INSPECTIONS_PARTITION:
+    # A partitioned table's primary key has to include the partition column
+    TABLE_KEYS['Inspections'] = ('inspection_id', 'inspection_date')
+
 #create tables script
-def create_tables(engine):
+def create_tables(engine, drop=True, partition_by=INSPECTIONS_PARTITION):
+    area_columns_sql = ''.join(f"\n            {col} smallint," for col in AREA_COLUMNS)
+    # Tables created before the area columns existed (incremental loads don't drop them)
+    add_area_columns_sql = ''.join(
+        f'\n        ALTER TABLE "Facility" ADD COLUMN IF NOT EXISTS {col} smallint;' for col in AREA_COLUMNS
+    )
+    # Computed by Postgres on every insert/update, so loads never send it
+    search_column_sql = f"""violation_search tsvector
+                GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', coalesce(violation_text, ''))) STORED"""
+    inspections_key = ', '.join(TABLE_KEYS['Inspections'])
+    partition_sql = "PARTITION BY RANGE (inspection_date)" if partition_by else ""
+    # A partitioned Inspections has no unique key on inspection_id alone to reference
+    inspection_fk_sql = "" if partition_by else """CONSTRAINT "InspectionViolations_inspection_id_fkey" FOREIGN KEY (inspection_id)
+                REFERENCES "Inspections" (inspection_id) MATCH SIMPLE
+                ON UPDATE NO ACTION
+                ON DELETE NO ACTION,"""
     with engine.connect() as conn:
-        create_sql = """
+        drop_sql = """
+        DROP TABLE IF EXISTS "InspectionViolations" CASCADE;
+        DROP TABLE IF EXISTS "Inspections" CASCADE;
+        DROP TABLE IF EXISTS "Violations" CASCADE;
+        DROP TABLE IF EXISTS "Facility" CASCADE;
+        """ if drop else ""
+        create_sql = f"""
         BEGIN;
-        
-        DROP TABLE IF EXISTS public."Inspections" CASCADE;
-        DROP TABLE IF EXISTS public."Violations" CASCADE;
-        DROP TABLE IF EXISTS public."Facility" CASCADE;
-        
-        
-        CREATE TABLE IF NOT EXISTS public."Facility"
+        {drop_sql}
+        CREATE TABLE IF NOT EXISTS "Facility"
         (
             license_id character varying,
             dba_name character varying,
@@ -50,80 +97,145 @@ def create_tables(engine):
             zip_code character varying(5),
             latitude numeric,
             longitude numeric,
+            geo_cell bigint,{area_columns_sql}
             PRIMARY KEY (license_id)
-        );
+        );{add_area_columns_sql}
 
-        CREATE TABLE IF NOT EXISTS public."Inspections"
+        CREATE TABLE IF NOT EXISTS "Inspections"
         (
-            inspection_id character varying NOT NULL,
+            inspection_id integer NOT NULL,
             license_id character varying,
             inspection_date date,
             inspection_type character varying,
             results character varying,
             violation_ids character varying,
             violation_text text,
-            PRIMARY KEY (inspection_id)
-        );
+            {search_column_sql},
+            PRIMARY KEY ({inspections_key}),
+            CONSTRAINT "Inspections_license_id_fkey" FOREIGN KEY (license_id)
+                REFERENCES "Facility" (license_id) MATCH SIMPLE
+                ON UPDATE NO ACTION
+                ON DELETE NO ACTION
+        ) {partition_sql};
+        -- Tables created before violation_search existed (incremental loads don't drop them)
+        ALTER TABLE "Inspections" ADD COLUMN IF NOT EXISTS {search_column_sql};
 
-        CREATE TABLE IF NOT EXISTS public."Violations"
+        CREATE TABLE IF NOT EXISTS "Violations"
         (
-            violation_id serial NOT NULL,
+            violation_id integer NOT NULL,
             violation_description character varying,
             PRIMARY KEY (violation_id)
         );
 
-        ALTER TABLE IF EXISTS public."Inspections"
-            ADD FOREIGN KEY (license_id)
-            REFERENCES public."Facility" (license_id) MATCH SIMPLE
-            ON UPDATE NO ACTION
-            ON DELETE NO ACTION
-            NOT VALID;
+        CREATE TABLE IF NOT EXISTS "InspectionViolations"
+        (
+            inspection_id integer NOT NULL,
+            violation_id integer NOT NULL,
+            comments text,
+            PRIMARY KEY (inspection_id, violation_id),
+            {inspection_fk_sql}
+            CONSTRAINT "InspectionViolations_violation_id_fkey" FOREIGN KEY (violation_id)
+                REFERENCES "Violations" (violation_id) MATCH SIMPLE
+                ON UPDATE NO ACTION
+                ON DELETE NO ACTION
+        );
 
         END;
                 """
         conn.execute(text(create_sql))
         print("Tables created.")
 
-#create connection
-if __name__ == "__main__":
-    try:
-        engine = create_engine(DATABASE_URL)
-        print("Connected to the database successfully.")
-        create_tables(engine)
-    except OperationalError as e:
-        print("Failed to connect to the database.")
-        print("Error:", e)
+#engines whose search_path is a single ETL schema, so unqualified names in the load resolve there
+def schema_engine(schema):
+    return create_engine(
+        DATABASE_URL,
+        pool_size=max(5, LOAD_WORKERS),
+        connect_args={'options': f'-csearch_path={schema}'},
+    )
 
-# create smaller df's for easier push
-if __name__ == "__main__":
-    facility_df = df[[
-        'license_id', 'dba_name', 'aka_name', 'facility_type',
-        'risk', 'address', 'city', 'state', 'zip_code',
-        'latitude', 'longitude'
-    ]].copy()
-    facility_df = facility_df.drop_duplicates()
-
-    inspections_df = df[[
-        'inspection_id', 'license_id', 'inspection_date',
-        'inspection_type', 'results', 'violation_ids', 'violations'
-    ]].copy()
-    inspections_df.rename(columns={'violations': 'violation_text'}, inplace=True)
-
-    duplicated_rows = facility_df[facility_df.duplicated(subset='license_id', keep=False)]
-    duplicated_rows = duplicated_rows.sort_values(by='license_id').reset_index(drop=True)
-    duplicated_rows['null_count'] = duplicated_rows.isnull().sum(axis=1)
-    cleaned_duplicates = duplicated_rows.sort_values(by=['license_id', 'null_count']).drop_duplicates(subset='license_id', keep='first')
-    facility_df = facility_df[~facility_df['license_id'].isin(duplicated_rows['license_id'])]
-    facility_df = pd.concat([facility_df, cleaned_duplicates.drop(columns='null_count')], ignore_index=True)
+def create_data_engine(schema=DATA_SCHEMA):
+    """
+    Returns an engine for the ETL's own schema, creating the schema if missing. The ETL never
+    touches public, so objects other tools keep there survive every load.
+    """
+    engine = schema_engine(schema)
+    with engine.begin() as conn:
+        conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS {schema}'))
+        conn.execute(text(f'GRANT USAGE ON SCHEMA {schema} TO PUBLIC'))
+    return engine
+
+#blue/green full reloads: build everything in a shadow schema, then swap it in for DATA_SCHEMA
+def create_shadow_engine(engine, schema=SHADOW_SCHEMA):
+    """
+    Recreates an empty shadow schema and returns an engine whose search_path points only at it,
+    so every unqualified table, index and view name used by the load resolves inside the shadow copy.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP SCHEMA IF EXISTS {schema} CASCADE'))
+        conn.execute(text(f'CREATE SCHEMA {schema}'))
+        conn.execute(text(f'GRANT USAGE ON SCHEMA {schema} TO PUBLIC'))
+    print(f"Loading into shadow schema {schema}.")
+    return schema_engine(schema)
+
+def swap_schemas(engine, schema=SHADOW_SCHEMA, target=DATA_SCHEMA):
+    """
+    Atomically renames the shadow schema to target once it is fully loaded, indexed and analyzed.
+    Readers resolve table names per query, so they see either the old or the new tables, never
+    a partial load. The old schema is dropped afterwards, once queries still reading it finish.
+    Both schemas hold only ETL objects and get the same grants, so nothing else is lost.
+    """
+    previous = f"{target}_previous"
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP SCHEMA IF EXISTS {previous} CASCADE'))
+    with engine.begin() as conn:
+        conn.execute(text("SET LOCAL lock_timeout = '10s'"))
+        conn.execute(text(f'ALTER SCHEMA {target} RENAME TO {previous}'))
+        conn.execute(text(f'ALTER SCHEMA {schema} RENAME TO {target}'))
+    print(f"Swapped {schema} in as {target}.")
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP SCHEMA {previous} CASCADE'))
+
+#keep one facility record per license_id
+def resolve_facilities(facility_df, existing=None, strategy='complete', key='license_id'):
+    """
+    Resolves duplicate facility rows to a single record per license_id in one groupby pass.
+
+    Parameters:
+    - facility_df (DataFrame): Facility rows, possibly with repeated license_ids.
+    - existing (DataFrame or None): Already resolved records; pass the previous result to fold in chunks incrementally.
+    - strategy (str): 'complete' keeps the row with the fewest nulls per license_id,
+      'first' takes the first non-null value of every column per license_id.
+    """
+    if existing is not None:
+        facility_df = pd.concat([existing, facility_df], ignore_index=True)
+
+    if strategy == 'first':
+        return facility_df.groupby(key, sort=False, as_index=False).first()
+    if strategy != 'complete':
+        raise ValueError(f"Unknown facility resolve strategy: {strategy}")
+
+    # idxmin returns the first row with the fewest nulls, so earlier records win ties
+    null_count = facility_df.isnull().sum(axis=1)
+    best_rows = null_count.groupby(facility_df[key], sort=False).idxmin()
+    return facility_df.loc[best_rows.values].reset_index(drop=True)
 
 #separation for violations table
-def extract_violations(df):
+def count_violation_descriptions(df, counts=None):
+    """
+    Counts occurrences of every (violation_id, violation_description) pair in the violations column.
+
+    Parameters:
+    - df (DataFrame): Cleaned inspections with a pipe-delimited 'violations' column.
+    - counts (Series or None): Counts from earlier chunks to add onto, so the catalog can be built incrementally.
+    """
     violations_series = df['violations'].dropna()
     all_violations = violations_series.str.split('|').explode().str.strip()
-    all_violations = all_violations[all_violations != ''].drop_duplicates()
+    # Parse each distinct entry once and carry its number of occurrences along
+    entry_counts = all_violations[all_violations != ''].value_counts()
     # Extract the ID vs. description
-    extracted = all_violations.str.extract(r'^\s*(\d+)\.\s*(.*?)(?:\s*-\s*comments:.*)?$')
+    extracted = entry_counts.index.to_series().str.extract(r'^\s*(\d+)\.\s*(.*?)(?:\s*-\s*comments:.*)?$')
     extracted.columns = ['violation_id', 'violation_description']
+    extracted['count'] = entry_counts.values
     extracted = extracted.dropna(subset=['violation_id', 'violation_description'])
     # Clean up whitespace/special characters in description
     extracted['violation_description'] = (
@@ -132,28 +244,948 @@ def extract_violations(df):
         .str.replace(r'[\s\.\-\–\|]+$', '', regex=True)   # Trailing
         .str.strip()
     )
-    # Group by violation_id and select the most common description
-    violations_df = (
-        extracted.groupby('violation_id')['violation_description']
-        .agg(lambda x: x.mode().iloc[0])
-        .reset_index()
-        .sort_values(by='violation_id')
-    )
+    chunk_counts = extracted.groupby(['violation_id', 'violation_description'])['count'].sum()
+    if counts is not None:
+        chunk_counts = chunk_counts.add(counts, fill_value=0).astype(int)
+    return chunk_counts
 
-    return violations_df.reset_index(drop=True)
+def build_violations_catalog(counts):
+    """
+    Picks the most common description per violation_id from pair counts.
+    Ties go to the alphabetically first description, matching Series.mode().
+    """
+    best_pairs = counts.sort_index().groupby(level='violation_id').idxmax()
+    violations_df = pd.DataFrame(best_pairs.tolist(), columns=['violation_id', 'violation_description'])
+    return violations_df.sort_values(by='violation_id').reset_index(drop=True)
 
-if __name__ == "__main__":
+def extract_violations(df):
+    return build_violations_catalog(count_violation_descriptions(df))
+
+#one row per (inspection, violation) for the InspectionViolations junction table
+def extract_inspection_violations(df, violations_df):
+    """
+    Splits each inspection's pipe-delimited violations into (inspection_id, violation_id, comments) rows.
+    Only ids present in the violations catalog are kept, and a violation repeated within one
+    inspection keeps its first comment.
+    """
+    all_violations = df.set_index('inspection_id')['violations'].dropna().str.split('|').explode().str.strip()
+    extracted = all_violations.str.extract(r'^\s*(\d+)\.\s*.*?(?:\s*-\s*comments:\s*(.*))?$')
+    extracted.columns = ['violation_id', 'comments']
+    extracted = extracted.dropna(subset=['violation_id']).reset_index()
+    extracted['inspection_id'] = extracted['inspection_id'].astype(int)
+    extracted['violation_id'] = extracted['violation_id'].astype(int)
+    extracted = extracted[extracted['violation_id'].isin(violations_df['violation_id'].astype(int))]
+    return extracted.drop_duplicates(subset=['inspection_id', 'violation_id']).reset_index(drop=True)
+
+# create smaller df's for easier push
+FACILITY_COLUMNS = [
+    'license_id', 'dba_name', 'aka_name', 'facility_type',
+    'risk', 'address', 'city', 'state', 'zip_code',
+    'latitude', 'longitude', 'geo_cell', *AREA_COLUMNS
+]
+INSPECTION_COLUMNS = [
+    'inspection_id', 'license_id', 'inspection_date',
+    'inspection_type', 'results', 'violation_ids', 'violations'
+]
+
+#columns of every table as built from the cleaned frame, in load order
+TABLE_COLUMNS = {
+    'Facility': FACILITY_COLUMNS,
+    'Inspections': [col if col != 'violations' else 'violation_text' for col in INSPECTION_COLUMNS],
+    'Violations': ['violation_id', 'violation_description'],
+    'InspectionViolations': ['inspection_id', 'violation_id', 'comments'],
+}
+
+def select_inspections(df):
+    return df[INSPECTION_COLUMNS].rename(columns={'violations': 'violation_text'})
+
+def split_tables(df):
+    """
+    Splits the cleaned inspections frame into the Facility and Inspections frames.
+    """
+    facility_df = resolve_facilities(df[FACILITY_COLUMNS])
+    return {'Facility': facility_df, 'Inspections': select_inspections(df)}
+
+def build_violation_tables(df):
+    """
+    Builds the Violations catalog and the InspectionViolations junction frame.
+    """
     violations_df = extract_violations(df)
-    df_dict = {'Facility': facility_df, 'Inspections': inspections_df, 'Violations': violations_df}
+    inspection_violations_df = extract_inspection_violations(df, violations_df)
+    return {'Violations': violations_df, 'InspectionViolations': inspection_violations_df}
+
+def build_tables(df):
+    """
+    Returns the frames for every table keyed by table name, in foreign key load order.
+    """
+    return {**split_tables(df), **build_violation_tables(df)}
+
+#bulk load a dataframe with COPY, one in-memory CSV buffer per chunk
+def copy_chunks(cur, df, table_name, chunk_size=COPY_CHUNK_SIZE):
+    """
+    Streams a DataFrame into an existing table with COPY ... FROM STDIN through an open cursor,
+    leaving the transaction to the caller.
+
+    Parameters:
+    - cur (cursor): psycopg2 cursor.
+    - df (DataFrame): Rows to load; column names must match the table's columns.
+    - table_name (str): Target table name (quoted, so case is preserved).
+    - chunk_size (int): Number of rows serialized into the buffer per COPY call.
+    """
+    columns = ', '.join(f'"{col}"' for col in df.columns)
+    copy_sql = f'COPY "{table_name}" ({columns}) FROM STDIN WITH (FORMAT csv)'
+    for start in range(0, len(df), chunk_size):
+        buffer = io.StringIO()
+        # NaN/None are written as unquoted empty fields, which COPY reads as NULL
+        df.iloc[start:start + chunk_size].to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cur.copy_expert(copy_sql, buffer)
+
+def copy_to_sql(df, table_name, engine, chunk_size=COPY_CHUNK_SIZE):
+    """
+    Streams a DataFrame into an existing table with COPY ... FROM STDIN.
+    All chunks go through one transaction, so a failed load leaves the table untouched.
 
-def push_to_sql(df_dict, engine):
+    Parameters:
+    - df (DataFrame): Rows to load; column names must match the table's columns.
+    - table_name (str): Target table name (quoted, so case is preserved).
+    - engine (Engine): SQLAlchemy engine using the psycopg2 driver.
+    - chunk_size (int): Number of rows serialized into the buffer per COPY call.
+    """
+    raw_conn = engine.raw_connection()
     try:
+        with raw_conn.cursor() as cur:
+            copy_chunks(cur, df, table_name, chunk_size)
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+    return len(df)
+
+#write one dataframe with the configured method, falling back to to_sql if COPY fails
+def load_table(df, table_name, engine, method=LOAD_METHOD):
+    if method == 'copy':
+        try:
+            copy_to_sql(df, table_name, engine)
+            return
+        except Exception as e:
+            print(f"COPY into {table_name} failed, falling back to INSERT: {e}")
+    df.to_sql(table_name, engine, if_exists='append', index=False)
+
+#foreign key order for concurrent loads: every table in a stage loads once the previous stage is done
+TABLE_LOAD_STAGES = (('Facility',), ('Inspections', 'Violations'), ('InspectionViolations',))
+
+#load several tables over a pool of connections
+def load_tables_parallel(df_dict, engine, workers=LOAD_WORKERS, method=LOAD_METHOD, stages=TABLE_LOAD_STAGES):
+    """
+    Loads tables concurrently, splitting each into slices pushed over separate connections.
+    Each slice commits on its own, so a failed run can leave a table partially loaded.
+
+    Parameters:
+    - df_dict (dict): Table name -> DataFrame.
+    - workers (int): Number of concurrent connections.
+    - stages (tuple): Groups of table names loaded one group after another, so referenced
+      tables (e.g. Facility) are complete before the tables whose foreign keys point at them.
+      Tables not listed in any stage load in a final stage.
+    """
+    staged = [name for stage in stages for name in stage]
+    unstaged = tuple(name for name in df_dict if name not in staged)
+    for stage in tuple(stages) + (unstaged,):
+        stage_tables = [name for name in stage if name in df_dict]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for table_name in stage_tables:
+                df = df_dict[table_name]
+                # One slice per connection; copy_to_sql still buffers each slice COPY_CHUNK_SIZE rows at a time
+                slice_size = max(1, -(-len(df) // workers))
+                for start in range(0, len(df), slice_size):
+                    futures.append(pool.submit(load_table, df.iloc[start:start + slice_size], table_name, engine, method))
+            for future in as_completed(futures):
+                future.result()
+        for table_name in stage_tables:
+            print(f"{table_name} data inserted successfully.")
+
+def push_to_sql(df_dict, engine, method=LOAD_METHOD, workers=LOAD_WORKERS):
+    try:
+        if workers > 1:
+            load_tables_parallel(df_dict, engine, workers, method)
+            return True
         for table_name, df in df_dict.items():
-            df.to_sql(table_name, engine, if_exists='append', index=False)
+            load_table(df, table_name, engine, method)
+            print(f"{table_name} data inserted successfully.")
+        return True
+    except Exception as e:
+        print(f"Error inserting data: {e}")
+        return False
+
+#chunked loading: table chunks are built from slices of the cleaned frame and handed to the
+#database writer through a bounded queue, so only a few chunks exist at any time
+def budget_chunk_rows(df, budget_mb=LOAD_MEMORY_BUDGET_MB, queue_size=LOAD_QUEUE_SIZE):
+    """
+    Rows per slice of the cleaned frame so the chunks in flight fit in budget_mb: the queued ones,
+    the one being built and the one being written. Each slice's table frames and CSV buffers
+    take roughly three times the slice itself.
+    """
+    sample = df.head(1000)
+    bytes_per_row = max(sample.memory_usage(deep=True).sum() / max(len(sample), 1), 1)
+    return max(1000, int(budget_mb * 2 ** 20 / (bytes_per_row * 3 * (queue_size + 2))))
+
+def build_reference_tables(df, chunk_rows):
+    """
+    Builds Facility and Violations a slice at a time, folding each slice into the running result,
+    so no full-length copy of the cleaned frame's columns is made.
+    """
+    facility_df, counts = None, None
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        facility_df = resolve_facilities(chunk[FACILITY_COLUMNS], existing=facility_df)
+        counts = count_violation_descriptions(chunk, counts)
+    return {'Facility': facility_df, 'Violations': build_violations_catalog(counts)}
+
+def iter_table_chunks(df, violations_df, chunk_rows):
+    """
+    Yields (table name, frame) pairs for each slice of the cleaned frame, built only when the
+    writer is ready for them. A slice's Inspections come before its InspectionViolations.
+    """
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        yield 'Inspections', select_inspections(chunk)
+        yield 'InspectionViolations', extract_inspection_violations(chunk, violations_df)
+
+def write_chunks(chunks, engine, method=LOAD_METHOD, table_suffix='', queue_size=LOAD_QUEUE_SIZE):
+    """
+    Builds chunks on a background thread and writes them on this one. The queue holds at most
+    queue_size chunks, so the builder blocks (backpressure) whenever the database falls behind.
+    Returns {table name: rows written}.
+    """
+    pending = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+
+    def offer(item):
+        # Waits for room in the queue, giving up once the writer has stopped
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in chunks:
+                if not offer(item):
+                    return
+        except Exception as e:
+            errors.append(e)
+        offer(None)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    rows = {}
+    try:
+        while True:
+            item = pending.get()
+            if item is None:
+                break
+            table_name, df = item
+            load_table(df, f"{table_name}{table_suffix}", engine, method)
+            rows[table_name] = rows.get(table_name, 0) + len(df)
+    finally:
+        stop.set()
+        producer.join()
+    if errors:
+        raise errors[0]
+    return rows
+
+def push_chunked(df, engine, method=LOAD_METHOD, budget_mb=LOAD_MEMORY_BUDGET_MB, table_suffix=''):
+    """
+    Loads every table from the cleaned frame within a memory budget. Facility and Violations are
+    built first (one row per license / violation id) and loaded whole; Inspections and
+    InspectionViolations are streamed in chunks. Each chunk commits on its own.
+    Returns {table name: rows loaded}, or None if the load failed.
+
+    Parameters:
+    - df (DataFrame): Cleaned inspections frame from transform.clean_all().
+    - budget_mb (int): Approximate memory for chunks in flight, see budget_chunk_rows().
+    - table_suffix (str): Appended to every table name, e.g. '_staging'.
+    """
+    try:
+        chunk_rows = budget_chunk_rows(df, budget_mb)
+        print(f"Loading in chunks of {chunk_rows} rows ({budget_mb} MB budget).")
+        reference_tables = build_reference_tables(df, chunk_rows)
+        for table_name, table_df in reference_tables.items():
+            load_table(table_df, f"{table_name}{table_suffix}", engine, method)
             print(f"{table_name} data inserted successfully.")
+        chunks = iter_table_chunks(df, reference_tables['Violations'], chunk_rows)
+        rows = write_chunks(chunks, engine, method, table_suffix)
+        for table_name, count in rows.items():
+            print(f"{table_name}: {count} rows inserted in chunks.")
     except Exception as e:
         print(f"Error inserting data: {e}")
+        return None
+    return {**{name: len(table_df) for name, table_df in reference_tables.items()}, **rows}
+
+#incremental mode: load into staging tables, then merge only new/changed rows
+def create_staging_tables(engine, table_names):
+    with engine.begin() as conn:
+        for table_name in table_names:
+            conn.execute(text(f'DROP TABLE IF EXISTS "{table_name}_staging"'))
+            conn.execute(text(f'CREATE UNLOGGED TABLE "{table_name}_staging" (LIKE "{table_name}")'))
+
+def merge_staging(engine, table_name, columns):
+    """
+    Upserts a staging table into its live table with INSERT ... ON CONFLICT DO UPDATE.
+    Rows identical to the live version are skipped, so only new/changed rows are written.
+    Returns a DataFrame with the MERGE_RETURNING columns (the key by default) of every row
+    inserted or updated.
+    """
+    key_cols = TABLE_KEYS[table_name]
+    returning_cols = MERGE_RETURNING.get(table_name, key_cols)
+    column_list = ', '.join(columns)
+    update_cols = [col for col in columns if col not in key_cols]
+    set_sql = ', '.join(f'{col} = EXCLUDED.{col}' for col in update_cols)
+    target_row = ', '.join(f'target.{col}' for col in update_cols)
+    excluded_row = ', '.join(f'EXCLUDED.{col}' for col in update_cols)
+    merge_sql = f"""
+        INSERT INTO "{table_name}" AS target ({column_list})
+        SELECT {column_list} FROM "{table_name}_staging"
+        ON CONFLICT ({', '.join(key_cols)}) DO UPDATE SET {set_sql}
+        WHERE ({target_row}) IS DISTINCT FROM ({excluded_row})
+        RETURNING {', '.join(f'target.{col}' for col in returning_cols)}
+    """
+    with engine.begin() as conn:
+        merged = pd.DataFrame(conn.execute(text(merge_sql)).fetchall(), columns=list(returning_cols))
+        conn.execute(text(f'DROP TABLE "{table_name}_staging"'))
+    return merged
+
+def previous_versions(engine, table_name, columns):
+    """
+    Returns the MERGE_RETURNING columns of the live rows that merge_staging() is about to update,
+    i.e. their values before the merge. merge_staging() only reports the new values, so a row
+    moved to another date or license would otherwise leave its old period and license stale.
+    """
+    key_cols = TABLE_KEYS[table_name]
+    returning_cols = MERGE_RETURNING[table_name]
+    update_cols = [col for col in columns if col not in key_cols]
+    with engine.connect() as conn:
+        result = conn.execute(text(f"""
+            SELECT {', '.join(f'target.{col}' for col in returning_cols)}
+            FROM "{table_name}" target
+            JOIN "{table_name}_staging" s USING ({', '.join(key_cols)})
+            WHERE ({', '.join(f'target.{col}' for col in update_cols)})
+                  IS DISTINCT FROM ({', '.join(f's.{col}' for col in update_cols)})
+        """))
+        return pd.DataFrame(result.fetchall(), columns=list(returning_cols))
+
+def upsert_to_sql(df_dict, engine, method=LOAD_METHOD, workers=LOAD_WORKERS):
+    """
+    Merges every table through staging. Returns {table name: DataFrame of touched rows}
+    (see merge_staging) plus 'Inspections_previous', the pre-merge values of changed
+    inspections (see previous_versions), or None if the merge failed.
+    """
+    try:
+        create_staging_tables(engine, df_dict.keys())
+        staging_dict = {f"{table_name}_staging": df for table_name, df in df_dict.items()}
+        if workers > 1:
+            # Staging tables carry no foreign keys, so every table can load at once
+            load_tables_parallel(staging_dict, engine, workers, method, stages=())
+        else:
+            for staging_name, df in staging_dict.items():
+                load_table(df, staging_name, engine, method)
+        return merge_all_staging(engine, {table_name: list(df.columns) for table_name, df in df_dict.items()},
+                                 {table_name: len(df) for table_name, df in df_dict.items()})
+    except Exception as e:
+        print(f"Error merging data: {e}")
+        return None
+
+def prune_inspection_violations(engine, inspection_ids):
+    """
+    Deletes junction rows of the given inspections that are no longer in InspectionViolations_staging,
+    i.e. violations a changed inspection stopped citing. Returns the deleted keys.
+    """
+    with engine.begin() as conn:
+        result = conn.execute(text("""
+            DELETE FROM "InspectionViolations" iv
+            WHERE iv.inspection_id = ANY(CAST(:inspection_ids AS integer[]))
+              AND NOT EXISTS (
+                  SELECT 1 FROM "InspectionViolations_staging" s
+                  WHERE s.inspection_id = iv.inspection_id AND s.violation_id = iv.violation_id
+              )
+            RETURNING iv.inspection_id, iv.violation_id
+        """), {'inspection_ids': [int(x) for x in inspection_ids]})
+        return pd.DataFrame(result.fetchall(), columns=['inspection_id', 'violation_id'])
+
+def merge_all_staging(engine, table_columns, row_counts):
+    # Merge in dict order so Facility rows exist before the Inspections that reference them
+    touched = {}
+    for table_name, columns in table_columns.items():
+        pruned = None
+        if table_name == 'InspectionViolations' and 'Inspections' in touched:
+            # The junction rows of a changed inspection are replaced, not just upserted
+            pruned = prune_inspection_violations(engine, touched['Inspections']['inspection_id'].unique())
+            print(f"InspectionViolations: {len(pruned)} rows no longer cited removed.")
+        if table_name == 'Inspections':
+            touched['Inspections_previous'] = previous_versions(engine, table_name, columns)
+        touched[table_name] = merge_staging(engine, table_name, columns)
+        if pruned is not None:
+            touched[table_name] = pd.concat([touched[table_name], pruned], ignore_index=True)
+        print(f"{table_name}: {len(touched[table_name])} of {row_counts[table_name]} rows new or changed.")
+    return touched
+
+def upsert_chunked(df, engine, method=LOAD_METHOD, budget_mb=LOAD_MEMORY_BUDGET_MB):
+    """
+    Incremental counterpart of push_chunked(): streams the cleaned frame into staging tables,
+    then merges them. Returns the touched rows like upsert_to_sql(), or None on failure.
+    """
+    try:
+        create_staging_tables(engine, TABLE_KEYS.keys())
+        row_counts = push_chunked(df, engine, method, budget_mb, table_suffix='_staging')
+        if row_counts is None:
+            return None
+        return merge_all_staging(engine, TABLE_COLUMNS, row_counts)
+    except Exception as e:
+        print(f"Error merging data: {e}")
+        return None
+
+#range partitions of Inspections, created on demand for the periods being loaded
+def partition_bounds(dates, partition_by=INSPECTIONS_PARTITION):
+    """
+    Returns (name suffix, start date, end date) for every period present in dates.
+
+    Parameters:
+    - dates (Series): inspection_date values.
+    - partition_by (str): 'year' or 'month'.
+    """
+    freq = 'Y' if partition_by == 'year' else 'M'
+    suffix_format = '%Y' if partition_by == 'year' else '%Y_%m'
+    periods = pd.to_datetime(pd.Series(dates)).dropna().dt.to_period(freq).unique()
+    return [
+        (period.strftime(suffix_format), period.start_time.date(), (period + 1).start_time.date())
+        for period in sorted(periods)
+    ]
+
+def create_inspection_partitions(engine, dates, partition_by=INSPECTIONS_PARTITION):
+    with engine.begin() as conn:
+        for suffix, start, end in partition_bounds(dates, partition_by):
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS "Inspections_{suffix}"
+                PARTITION OF "Inspections"
+                FOR VALUES FROM ('{start}') TO ('{end}')
+            """))
+    print("Inspection partitions ready.")
+
+def reload_inspection_partition(inspections_df, engine, period, partition_by=INSPECTIONS_PARTITION):
+    """
+    Replaces the rows of a single partition without touching the rest of Inspections, then
+    refreshes the aggregate views, rollups and facility summaries and records the run.
+    The truncate and COPY share one transaction: readers keep the old rows until it commits
+    (waiting on the partition meanwhile), and a failed COPY leaves them in place.
+
+    Parameters:
+    - inspections_df (DataFrame): Inspection rows; only those inside the period are loaded.
+    - engine (Engine): Engine on the schema holding Inspections, e.g. create_data_engine().
+    - period (str): Period to rebuild, e.g. '2019' for yearly or '2019-03' for monthly partitions.
+    """
+    period = pd.Period(period, freq='Y' if partition_by == 'year' else 'M')
+    dates = pd.to_datetime(inspections_df['inspection_date'])
+    period_df = inspections_df[dates.dt.to_period(period.freq) == period]
+
+    suffix, start, end = partition_bounds([period.start_time], partition_by)[0]
+    create_inspection_partitions(engine, [period.start_time], partition_by)
+    key_columns = list(MERGE_RETURNING['Inspections'])
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cur:
+            # The replaced rows' licenses need their summaries rebuilt too
+            cur.execute(f'SELECT {", ".join(key_columns)} FROM "Inspections_{suffix}"')
+            previous = pd.DataFrame(cur.fetchall(), columns=key_columns)
+            cur.execute(f'TRUNCATE "Inspections_{suffix}"')
+            copy_chunks(cur, period_df, f"Inspections_{suffix}")
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+    print(f"Partition Inspections_{suffix} reloaded with {len(period_df)} rows.")
+
+    touched = {'Inspections': pd.concat([previous, period_df[key_columns]], ignore_index=True)}
+    refresh_aggregate_views(engine)
+    refresh_rollups(engine, touched)
+    refresh_facility_summary(engine, touched)
+    record_load_run(engine, 'partition', len(period_df))
+
+#secondary indexes matching the dashboard's joins, filters and groupings
+SECONDARY_INDEXES = {
+    'idx_inspections_license_id': 'ON "Inspections" (license_id)',
+    # Also serves the dashboard's keyset pagination order
+    'idx_inspections_inspection_date': 'ON "Inspections" (inspection_date, inspection_id)',
+    'idx_inspections_results': 'ON "Inspections" (results)',
+    'idx_inspections_violation_search': 'ON "Inspections" USING GIN (violation_search)',
+    'idx_inspection_violations_violation_id': 'ON "InspectionViolations" (violation_id)',
+    'idx_facility_city': 'ON "Facility" (city)',
+    'idx_facility_risk': 'ON "Facility" (risk)',
+    'idx_facility_geo_cell': 'ON "Facility" (geo_cell)',
+    **{f'idx_facility_{col}': f'ON "Facility" ({col})' for col in AREA_COLUMNS},
+    'idx_facility_coordinates': 'ON "Facility" (license_id) INCLUDE (latitude, longitude) '
+                                'WHERE latitude IS NOT NULL AND longitude IS NOT NULL',
+}
+
+#queries mirroring streamlit/app.py, used to report plans after indexing
+DASHBOARD_QUERIES = {
+    'map join': """
+        SELECT i.inspection_id, f.dba_name, f.latitude, f.longitude
+        FROM "Inspections" i
+        JOIN "Facility" f ON i.license_id = f.license_id
+        WHERE f.latitude IS NOT NULL AND f.longitude IS NOT NULL
+    """,
+    'city filter': """
+        SELECT f.dba_name, i.inspection_date, i.results, f.risk
+        FROM "Inspections" i
+        JOIN "Facility" f ON i.license_id = f.license_id
+        WHERE f.city = 'Chicago'
+    """,
+    'facilities with violation 38': """
+        SELECT DISTINCT f.license_id, f.dba_name
+        FROM "InspectionViolations" iv
+        JOIN "Inspections" i ON iv.inspection_id = i.inspection_id
+        JOIN "Facility" f ON i.license_id = f.license_id
+        WHERE iv.violation_id = 38
+    """,
+    'violation search': f"""
+        SELECT inspection_id, ts_rank(violation_search, query) AS rank
+        FROM "Inspections", websearch_to_tsquery('{SEARCH_CONFIG}', 'rodent') query
+        WHERE violation_search @@ query
+        ORDER BY rank DESC
+        LIMIT 50
+    """,
+    'ward counts': """
+        SELECT f.ward, count(*)
+        FROM "Inspections" i
+        JOIN "Facility" f ON i.license_id = f.license_id
+        WHERE f.ward = 42
+        GROUP BY f.ward
+    """,
+    'monthly counts': """
+        SELECT date_trunc('month', inspection_date) AS month, count(*)
+        FROM "Inspections"
+        GROUP BY 1
+    """,
+}
+
+def drop_secondary_indexes(engine):
+    """
+    Drops the secondary indexes so bulk loads don't maintain them row by row.
+    """
+    with engine.begin() as conn:
+        for index_name in SECONDARY_INDEXES:
+            conn.execute(text(f'DROP INDEX IF EXISTS {index_name}'))
+    print("Secondary indexes dropped.")
+
+def build_secondary_indexes(engine):
+    """
+    Rebuilds the secondary indexes after loading (creating only missing ones if they were kept)
+    and refreshes planner statistics.
+    """
+    with engine.begin() as conn:
+        for index_name, definition in SECONDARY_INDEXES.items():
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS {index_name} {definition}'))
+        conn.execute(text(
+            'ANALYZE "Facility", "Inspections", "Violations", "InspectionViolations"'
+        ))
+    print("Secondary indexes built and tables analyzed.")
+
+def collect_query_plans(engine):
+    """
+    Returns the estimated plan lines of each dashboard query, keyed by label. Queries that
+    can't be planned (e.g. no tables yet before a first load) are left out.
+    """
+    plans = {}
+    for label, query in DASHBOARD_QUERIES.items():
+        try:
+            with engine.connect() as conn:
+                plans[label] = conn.execute(text(f"EXPLAIN {query}")).scalars().all()
+        except SQLAlchemyError:
+            continue
+    return plans
+
+def report_query_plans(engine, before=None):
+    """
+    Prints the estimated plan for each dashboard query so index usage can be checked after a load,
+    next to the plan the same query had before the load when it differs.
+
+    Parameters:
+    - before (dict or None): Plans from collect_query_plans() taken before the load.
+    """
+    before = before or {}
+    for label, plan in collect_query_plans(engine).items():
+        if label not in before:
+            print(f"Plan for {label}:")
+        elif before[label] == plan:
+            print(f"Plan for {label} (unchanged by the load):")
+        else:
+            print(f"Plan for {label} before the load:")
+            for line in before[label]:
+                print(f"    {line}")
+            print(f"Plan for {label} after the load:")
+        for line in plan:
+            print(f"    {line}")
+
+#pre-aggregated views read by the dashboard, keyed on their unique grouping columns
+AGGREGATE_VIEWS = {
+    'dashboard_risk_counts': (('risk',), """
+        SELECT f.risk, count(*) AS inspection_count
+        FROM "Inspections" i
+        JOIN "Facility" f ON i.license_id = f.license_id
+        WHERE f.latitude IS NOT NULL AND f.longitude IS NOT NULL AND f.risk IS NOT NULL
+        GROUP BY f.risk
+    """),
+    'dashboard_results_counts': (('results',), """
+        SELECT i.results, count(*) AS inspection_count
+        FROM "Inspections" i
+        JOIN "Facility" f ON i.license_id = f.license_id
+        WHERE f.latitude IS NOT NULL AND f.longitude IS NOT NULL AND i.results IS NOT NULL
+        GROUP BY i.results
+    """),
+    'dashboard_monthly_counts': (('inspection_month',), """
+        SELECT date_trunc('month', i.inspection_date)::date AS inspection_month, count(*) AS inspection_count
+        FROM "Inspections" i
+        JOIN "Facility" f ON i.license_id = f.license_id
+        WHERE f.latitude IS NOT NULL AND f.longitude IS NOT NULL AND i.inspection_date IS NOT NULL
+        GROUP BY 1
+    """),
+    'dashboard_sunburst_counts': (('risk', 'results', 'inspection_type'), """
+        SELECT f.risk, i.results, i.inspection_type, count(*) AS inspection_count
+        FROM "Inspections" i
+        JOIN "Facility" f ON i.license_id = f.license_id
+        WHERE f.latitude IS NOT NULL AND f.longitude IS NOT NULL
+          AND f.risk IS NOT NULL AND i.results IS NOT NULL AND i.inspection_type IS NOT NULL
+        GROUP BY f.risk, i.results, i.inspection_type
+    """),
+    'dashboard_ward_counts': (('ward',), """
+        SELECT f.ward, count(*) AS inspection_count,
+               count(*) FILTER (WHERE i.results = 'Fail') AS fail_count
+        FROM "Inspections" i
+        JOIN "Facility" f ON i.license_id = f.license_id
+        WHERE f.ward IS NOT NULL
+        GROUP BY f.ward
+    """),
+    'dashboard_community_area_counts': (('community_area',), """
+        SELECT f.community_area, count(*) AS inspection_count,
+               count(*) FILTER (WHERE i.results = 'Fail') AS fail_count
+        FROM "Inspections" i
+        JOIN "Facility" f ON i.license_id = f.license_id
+        WHERE f.community_area IS NOT NULL
+        GROUP BY f.community_area
+    """),
+    'dashboard_city_counts': (('city',), """
+        SELECT f.city, count(*) AS inspection_count
+        FROM "Inspections" i
+        JOIN "Facility" f ON i.license_id = f.license_id
+        WHERE f.latitude IS NOT NULL AND f.longitude IS NOT NULL AND f.city IS NOT NULL
+        GROUP BY f.city
+    """),
+}
+
+def refresh_aggregate_views(engine):
+    """
+    Creates the dashboard's materialized views if missing, otherwise refreshes them concurrently
+    so the dashboard keeps reading the previous version until the refresh commits.
+    Each view gets a unique index, which REFRESH ... CONCURRENTLY requires, and a comment holding
+    a hash of its query so a view whose definition changed is rebuilt instead of refreshed.
+    """
+    with engine.begin() as conn:
+        for view_name, (key_cols, query) in AGGREGATE_VIEWS.items():
+            version = hashlib.sha256(query.encode()).hexdigest()[:16]
+            exists, current_version = conn.execute(
+                text("SELECT to_regclass(:name) IS NOT NULL, obj_description(to_regclass(:name), 'pg_class')"),
+                {'name': view_name}
+            ).one()
+            if exists and current_version == version:
+                conn.execute(text(f'REFRESH MATERIALIZED VIEW CONCURRENTLY {view_name}'))
+                continue
+            if exists:
+                conn.execute(text(f'DROP MATERIALIZED VIEW {view_name}'))
+            conn.execute(text(f'CREATE MATERIALIZED VIEW {view_name} AS {query}'))
+            conn.execute(text(
+                f'CREATE UNIQUE INDEX {view_name}_key ON {view_name} ({", ".join(key_cols)})'
+            ))
+            conn.execute(text(f"COMMENT ON MATERIALIZED VIEW {view_name} IS '{version}'"))
+    print("Dashboard aggregate views refreshed.")
+
+#daily/weekly/monthly inspection counts by result and risk for the dashboard's time series
+ROLLUP_GRANULARITIES = ('day', 'week', 'month')
+
+def refresh_rollups(engine, touched=None):
+    """
+    Maintains InspectionRollups. With touched=None every period is rebuilt; otherwise only the
+    periods containing a changed inspection (before or after the change), or any inspection of a
+    changed facility (its risk may have moved), are deleted and recomputed, so the cost follows
+    the size of the delta.
+
+    Parameters:
+    - touched (dict or None): Result of upsert_to_sql() for an incremental load.
+    """
+    aggregate_sql = """
+        SELECT :granularity, date_trunc(:granularity, i.inspection_date)::date AS period_start,
+               coalesce(i.results, 'Unknown'), coalesce(f.risk, 'Unknown'), count(*)
+        FROM "Inspections" i
+        JOIN "Facility" f ON i.license_id = f.license_id
+        WHERE f.latitude IS NOT NULL AND f.longitude IS NOT NULL AND i.inspection_date IS NOT NULL
+    """
+    if touched is not None:
+        # Old dates too: an inspection moved to another period has to leave its old one
+        inspections = [touched[name] for name in ('Inspections', 'Inspections_previous') if name in touched]
+        facilities = touched.get('Facility')
+        touched_params = {
+            'dates': [str(d) for df in inspections for d in df['inspection_date'] if pd.notna(d)],
+            'license_ids': [] if facilities is None else list(facilities['license_id']),
+        }
+
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS "InspectionRollups"
+            (
+                granularity character varying NOT NULL,
+                period_start date NOT NULL,
+                results character varying NOT NULL,
+                risk character varying NOT NULL,
+                inspection_count bigint NOT NULL,
+                PRIMARY KEY (granularity, period_start, results, risk)
+            )
+        """))
+        for granularity in ROLLUP_GRANULARITIES:
+            params = {'granularity': granularity}
+            if touched is None:
+                conn.execute(text('DELETE FROM "InspectionRollups" WHERE granularity = :granularity'), params)
+                conn.execute(text(f"""
+                    INSERT INTO "InspectionRollups" {aggregate_sql}
+                    GROUP BY 2, 3, 4
+                """), params)
+                continue
+
+            params.update(touched_params)
+            touched_periods = """
+                SELECT date_trunc(:granularity, d)::date FROM unnest(CAST(:dates AS date[])) AS d
+                UNION
+                SELECT date_trunc(:granularity, inspection_date)::date FROM "Inspections"
+                WHERE license_id = ANY(:license_ids)
+            """
+            conn.execute(text(f"""
+                DELETE FROM "InspectionRollups"
+                WHERE granularity = :granularity AND period_start IN ({touched_periods})
+            """), params)
+            conn.execute(text(f"""
+                INSERT INTO "InspectionRollups" {aggregate_sql}
+                AND date_trunc(:granularity, i.inspection_date)::date IN ({touched_periods})
+                GROUP BY 2, 3, 4
+            """), params)
+    print("Inspection rollups refreshed.")
+
+#one row per facility with its inspection history summarized, for "worst offender" questions
+def refresh_facility_summary(engine, touched=None):
+    """
+    Maintains FacilitySummary: inspection and fail counts, fail rate, last inspection date and
+    result, consecutive fails up to the latest inspection, distinct violations and current risk.
+    With touched=None every facility is rebuilt; otherwise only the licenses of changed facilities,
+    inspections (before or after the change) or inspection violations are deleted and recomputed.
+
+    Parameters:
+    - touched (dict or None): Result of upsert_to_sql() for an incremental load.
+    """
+    license_filter = ""
+    params = {}
+    if touched is not None:
+        # Previous licenses too: an inspection reassigned to another license leaves the old one's history
+        frames = [touched[name] for name in ('Facility', 'Inspections', 'Inspections_previous') if name in touched]
+        inspection_violations = touched.get('InspectionViolations')
+        params = {
+            'license_ids': sorted({license_id for df in frames for license_id in df['license_id'].dropna()}),
+            'inspection_ids': [] if inspection_violations is None
+                              else [int(x) for x in inspection_violations['inspection_id'].unique()],
+        }
+        license_filter = """
+            AND license_id IN (
+                SELECT unnest(CAST(:license_ids AS character varying[]))
+                UNION
+                SELECT license_id FROM "Inspections" WHERE inspection_id = ANY(CAST(:inspection_ids AS integer[]))
+            )
+        """
+    # recency 1 is each facility's latest inspection; the first non-failing one ends the fail streak
+    summary_sql = f"""
+        WITH ranked AS (
+            SELECT license_id, inspection_date, results,
+                   row_number() OVER (PARTITION BY license_id
+                                      ORDER BY inspection_date DESC, inspection_id DESC) AS recency
+            FROM "Inspections"
+            WHERE inspection_date IS NOT NULL {license_filter}
+        ),
+        history AS (
+            SELECT license_id,
+                   count(*) AS inspection_count,
+                   count(*) FILTER (WHERE results = 'Fail') AS fail_count,
+                   max(inspection_date) AS last_inspection_date,
+                   max(results) FILTER (WHERE recency = 1) AS last_result,
+                   coalesce(min(recency) FILTER (WHERE results IS DISTINCT FROM 'Fail'), count(*) + 1) - 1
+                       AS consecutive_fails
+            FROM ranked
+            GROUP BY license_id
+        ),
+        violations AS (
+            SELECT i.license_id, count(DISTINCT iv.violation_id) AS distinct_violations
+            FROM "InspectionViolations" iv
+            JOIN "Inspections" i ON iv.inspection_id = i.inspection_id
+            WHERE i.license_id IN (SELECT license_id FROM history)
+            GROUP BY i.license_id
+        )
+        SELECT f.license_id, f.dba_name, f.city, f.risk,
+               h.inspection_count, h.fail_count,
+               round(h.fail_count::numeric / h.inspection_count, 4),
+               h.last_inspection_date, h.last_result, h.consecutive_fails,
+               coalesce(v.distinct_violations, 0)
+        FROM history h
+        JOIN "Facility" f ON f.license_id = h.license_id
+        LEFT JOIN violations v ON v.license_id = h.license_id
+    """
+
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS "FacilitySummary"
+            (
+                license_id character varying NOT NULL,
+                dba_name character varying,
+                city character varying,
+                risk character varying,
+                inspection_count integer NOT NULL,
+                fail_count integer NOT NULL,
+                fail_rate numeric NOT NULL,
+                last_inspection_date date,
+                last_result character varying,
+                consecutive_fails integer NOT NULL,
+                distinct_violations integer NOT NULL,
+                PRIMARY KEY (license_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_facility_summary_fail_rate
+                ON "FacilitySummary" (fail_rate DESC, inspection_count DESC);
+            CREATE INDEX IF NOT EXISTS idx_facility_summary_consecutive_fails
+                ON "FacilitySummary" (consecutive_fails DESC, last_inspection_date DESC);
+        """))
+        if touched is None:
+            conn.execute(text('TRUNCATE "FacilitySummary"'))
+        else:
+            conn.execute(text(f'DELETE FROM "FacilitySummary" WHERE true {license_filter}'), params)
+        conn.execute(text(f'INSERT INTO "FacilitySummary" {summary_sql}'), params)
+        conn.execute(text('ANALYZE "FacilitySummary"'))
+    print("Facility summary refreshed.")
+
+#load version table: the dashboard keys its query cache on the latest run_id
+def record_load_run(engine, mode, rows_loaded, history_schema=None):
+    """
+    Appends a row to LoadRuns; a new run_id tells the dashboard its cached results are stale.
+
+    Parameters:
+    - mode (str): What changed the data, e.g. 'full', 'incremental' or 'aggregates'.
+    - rows_loaded (int): Number of rows pushed in this run.
+    - history_schema (str or None): Schema whose LoadRuns rows are copied over first, so a
+      shadow schema keeps the run history of the schema it replaces.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS "LoadRuns"
+            (
+                run_id bigint NOT NULL,
+                loaded_at timestamp with time zone NOT NULL DEFAULT now(),
+                mode character varying,
+                rows_loaded bigint,
+                PRIMARY KEY (run_id)
+            )
+        """))
+        if history_schema:
+            has_history = conn.execute(
+                text("SELECT to_regclass(:name) IS NOT NULL"), {'name': f'{history_schema}."LoadRuns"'}
+            ).scalar()
+            if has_history:
+                conn.execute(text(f'INSERT INTO "LoadRuns" SELECT * FROM {history_schema}."LoadRuns"'))
+        run_id = conn.execute(text("""
+            INSERT INTO "LoadRuns" (run_id, mode, rows_loaded)
+            SELECT coalesce(max(run_id), 0) + 1, :mode, :rows_loaded FROM "LoadRuns"
+            RETURNING run_id
+        """), {'mode': mode, 'rows_loaded': rows_loaded}).scalar()
+    print(f"Recorded load run {run_id}.")
+    return run_id
 
 # CALLING LOAD
+def load_all(tables, mode=LOAD_MODE):
+    """
+    Runs the whole load: schema, bulk load, indexes, aggregate views and (for full loads)
+    the shadow schema swap. Returns True if the data was loaded.
+
+    Parameters:
+    - tables (dict or DataFrame): Frames returned by build_tables(), or the cleaned frame itself,
+      which is then split into tables chunk by chunk within LOAD_MEMORY_BUDGET_MB.
+    """
+    chunked = isinstance(tables, pd.DataFrame)
+    try:
+        engine = create_data_engine()
+        print("Connected to the database successfully.")
+        # Taken before anything is dropped, to compare against the plans after the load
+        plans_before = collect_query_plans(engine)
+        load_engine = engine
+        if mode == 'full' and SHADOW_SCHEMA:
+            load_engine = create_shadow_engine(engine)
+        create_tables(load_engine, drop=(mode == 'full'))
+    except OperationalError as e:
+        print("Failed to connect to the database.")
+        print("Error:", e)
+        return False
+
+    # Incremental merges keep the indexes readers are using; build_secondary_indexes() below only
+    # creates any that are missing
+    if mode == 'full':
+        drop_secondary_indexes(load_engine)
+    if INSPECTIONS_PARTITION:
+        create_inspection_partitions(load_engine, (tables if chunked else tables['Inspections'])['inspection_date'])
+    touched = None
+    # Chunked runs count cleaned records, or rows written per table when push_chunked reports them
+    rows_loaded = len(tables) if chunked else sum(len(df) for df in tables.values())
+    if mode == 'incremental' and chunked:
+        touched = upsert_chunked(tables, load_engine)
+        loaded = touched is not None
+    elif mode == 'incremental':
+        touched = upsert_to_sql(tables, load_engine)
+        loaded = touched is not None
+    elif chunked:
+        row_counts = push_chunked(tables, load_engine)
+        loaded = row_counts is not None
+        rows_loaded = sum(row_counts.values()) if loaded else rows_loaded
+    else:
+        loaded = push_to_sql(tables, load_engine)
+    build_secondary_indexes(load_engine)
+    refresh_aggregate_views(load_engine)
+    if loaded:
+        refresh_rollups(load_engine, touched)
+        refresh_facility_summary(load_engine, touched)
+    if loaded:
+        # Recorded before the swap so the new run_id becomes visible together with the new data
+        record_load_run(load_engine, mode, rows_loaded,
+                        history_schema=DATA_SCHEMA if load_engine is not engine else None)
+    if load_engine is not engine:
+        load_engine.dispose()
+        if loaded:
+            swap_schemas(engine)
+        else:
+            print(f"Load failed, keeping the current {DATA_SCHEMA} schema; {SHADOW_SCHEMA} left for inspection.")
+    # A failed first load leaves DATA_SCHEMA without tables to plan against
+    if loaded:
+        report_query_plans(engine, before=plans_before)
+    engine.dispose()
+    return loaded
+
+#running load.py directly still runs the whole ETL, now through pipeline.py
 if __name__ == "__main__":
-    push_to_sql(df_dict, engine)
\ No newline at end of file
+    import pipeline
+    pipeline.main()
\ No newline at end of file
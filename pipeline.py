@@ -0,0 +1,275 @@
+import argparse
+import ast
+import hashlib
+import inspect
+import json
+import os
+import textwrap
+import time
+import pandas as pd
+from dotenv import load_dotenv
+import extract
+import transform
+import load
+
+# Runs the ETL as a small DAG in one process, handing outputs from stage to stage in memory.
+# With --artifacts-dir each stage's output is saved with a fingerprint of its inputs and code,
+# and a stage whose fingerprint is unchanged is skipped and its saved output reused.
+
+load_dotenv()
+
+RAW_DATA_FILE = "api_data_raw.json"
+MANIFEST_FILE = "manifest.json"
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def run_extract(inputs, num_records=100000):
+    api_url = os.getenv("API_KEY").strip()
+    data = extract.fetch_api_data(api_url, output_file=RAW_DATA_FILE, batch_size=1000,
+                                  num_records=num_records, restart=True)
+    return pd.DataFrame(data)
+
+def run_transform(inputs, **_):
+    return transform.clean_all(inputs['extract'])
+
+def run_tables(inputs, **_):
+    return load.split_tables(inputs['transform'])
+
+def run_violations(inputs, **_):
+    return load.build_violation_tables(inputs['transform'])
+
+def run_load(inputs, **_):
+    # Facility and Inspections come first so foreign keys are satisfied in load order
+    tables = inputs['transform'] if 'transform' in inputs else {**inputs['tables'], **inputs['violations']}
+    if not load.load_all(tables):
+        raise RuntimeError("Load stage failed.")
+
+def run_aggregates(inputs, **_):
+    # Everything derived from the loaded tables, rebuilt in full
+    engine = load.create_data_engine()
+    load.refresh_aggregate_views(engine)
+    load.refresh_rollups(engine)
+    load.refresh_facility_summary(engine)
+    load.record_load_run(engine, 'aggregates', 0)
+    engine.dispose()
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+#stage -> upstream stages, code and settings its output depends on, and its saved artifact.
+#Modules in 'code' are fingerprinted by their whole source; functions by their own source plus every
+#function and module-level value of this repo they reach, so a stage reruns only when code it calls changes.
+STAGES = {
+    'extract': {
+        'run': run_extract, 'inputs': [], 'artifact': 'raw.pkl',
+        'code': [run_extract, extract],
+        'params': lambda args: {'api_url': os.getenv("API_KEY", "").strip(), 'num_records': args['num_records']},
+    },
+    'transform': {
+        'run': run_transform, 'inputs': ['extract'], 'artifact': 'clean.pkl',
+        'code': [run_transform, transform],
+    },
+    'tables': {
+        'run': run_tables, 'inputs': ['transform'], 'artifact': 'tables.pkl',
+        'code': [run_tables],
+    },
+    'violations': {
+        'run': run_violations, 'inputs': ['transform'], 'artifact': 'violations.pkl',
+        'code': [run_violations],
+    },
+    'load': {
+        'run': run_load, 'inputs': ['tables', 'violations'], 'artifact': None,
+        'code': [run_load],
+        # load_all() refreshes these too, but the aggregates stage rebuilds them, so editing a view,
+        # rollup or summary query reruns only that stage
+        'exclude': [load.refresh_aggregate_views, load.refresh_rollups, load.refresh_facility_summary],
+        'params': lambda args: {
+            'database': f"{load.DB_HOST}:{load.DB_PORT}/{load.DB_NAME}", 'mode': load.LOAD_MODE,
+            'schema': load.DATA_SCHEMA, 'shadow_schema': load.SHADOW_SCHEMA, 'partition': load.INSPECTIONS_PARTITION,
+            'memory_budget_mb': load.LOAD_MEMORY_BUDGET_MB,
+        },
+    },
+    'aggregates': {
+        'run': run_aggregates, 'inputs': ['load'], 'artifact': None,
+        'code': [run_aggregates],
+        # load_all() already refreshes the views, so a load in the same run makes this a no-op
+        'done_by': 'load',
+    },
+}
+
+if load.LOAD_MEMORY_BUDGET_MB:
+    # Chunked loads build table chunks from the cleaned frame as they write, never whole tables
+    del STAGES['tables'], STAGES['violations']
+    STAGES['load']['inputs'] = ['transform']
+
+def is_repo_code(obj):
+    try:
+        path = inspect.getsourcefile(obj)
+    except TypeError:
+        return False
+    # generated code (e.g. decorator wrappers) reports a pseudo-path that isn't a file
+    return path is not None and os.path.isfile(path) and os.path.abspath(path).startswith(REPO_DIR + os.sep)
+
+def reachable_code(functions):
+    """
+    Returns the source of the given functions and of every function of this repo they reference,
+    transitively, plus the repr of the module-level values they read, keyed by file and name.
+    """
+    found = {}
+    pending = list(functions)
+    while pending:
+        func = pending.pop()
+        key = f"{os.path.relpath(inspect.getsourcefile(func), REPO_DIR)}:{func.__qualname__}"
+        if key in found:
+            continue
+        found[key] = inspect.getsource(func)
+        for node in ast.walk(ast.parse(textwrap.dedent(found[key]))):
+            # bare names resolve in the function's own module, module.name in an imported repo module
+            if isinstance(node, ast.Name):
+                namespace, name = func.__globals__, node.id
+            elif (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+                  and inspect.ismodule(func.__globals__.get(node.value.id))
+                  and is_repo_code(func.__globals__[node.value.id])):
+                namespace, name = vars(func.__globals__[node.value.id]), node.attr
+            else:
+                continue
+            if name not in namespace:
+                continue
+            value = namespace[name]
+            if inspect.isfunction(value):
+                if is_repo_code(value):
+                    pending.append(value)
+            elif not (inspect.ismodule(value) or callable(value)):
+                found[f"{os.path.relpath(namespace['__file__'], REPO_DIR)}:{name}"] = repr(value)
+    return found
+
+def code_version(objects, exclude=()):
+    """
+    Hashes the source of the modules and reachable functions a stage depends on, leaving out
+    whatever is reachable from the functions in exclude.
+    """
+    digest = hashlib.sha256()
+    for obj in objects:
+        if inspect.ismodule(obj):
+            digest.update(inspect.getsource(obj).encode())
+    excluded = reachable_code(exclude)
+    for key, source in sorted(reachable_code([obj for obj in objects if inspect.isfunction(obj)]).items()):
+        if key not in excluded:
+            digest.update(f"{key}\n{source}".encode())
+    return digest.hexdigest()
+
+def stage_fingerprint(stage, upstream_fingerprints, args):
+    spec = STAGES[stage]
+    params = spec['params'](args) if 'params' in spec else {}
+    payload = json.dumps([stage, code_version(spec['code'], spec.get('exclude', ())), upstream_fingerprints, params], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def read_manifest(artifacts_dir):
+    path = os.path.join(artifacts_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def write_manifest(artifacts_dir, manifest):
+    with open(os.path.join(artifacts_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+def run_pipeline(stages=None, artifacts_dir=None, num_records=100000, force=()):
+    """
+    Runs the DAG in order and prints how long each stage took.
+
+    Parameters:
+    - stages (list or None): Stages to run; None runs all of them. Outputs of stages that are not
+      selected are read from artifacts_dir.
+    - artifacts_dir (str or None): Directory for stage artifacts and the fingerprint manifest.
+      Without it nothing is cached and every selected stage runs.
+    - num_records (int): Maximum number of records to extract.
+    - force (tuple): Stages to rerun even if their fingerprint is unchanged (e.g. 'extract' to re-pull).
+    """
+    stages = list(STAGES) if stages is None else stages
+    args = {'num_records': num_records}
+    manifest = {}
+    if artifacts_dir:
+        os.makedirs(artifacts_dir, exist_ok=True)
+        manifest = read_manifest(artifacts_dir)
+
+    outputs = {}
+    output_fingerprints = {}
+
+    def get_output(stage):
+        if stage not in outputs:
+            artifact = STAGES[stage]['artifact']
+            # Stages without an artifact (load) only write to the database; downstream stages read it there
+            if artifact is None:
+                return None
+            if not artifacts_dir or stage not in manifest:
+                raise ValueError(f"No saved output for '{stage}'; run it first with --artifacts-dir.")
+            outputs[stage] = pd.read_pickle(os.path.join(artifacts_dir, artifact))
+        return outputs[stage]
+
+    timings = {}
+    for stage, spec in STAGES.items():
+        upstream = {name: output_fingerprints.get(name) for name in spec['inputs']}
+        fingerprint = stage_fingerprint(stage, upstream, args)
+        previous = manifest.get(stage, {})
+        artifact_path = os.path.join(artifacts_dir, spec['artifact']) if artifacts_dir and spec['artifact'] else None
+        cached = (
+            artifacts_dir and stage not in force and previous.get('input') == fingerprint
+            and (artifact_path is None or os.path.exists(artifact_path))
+        )
+
+        if stage not in stages or cached:
+            if stage in manifest:
+                output_fingerprints[stage] = manifest[stage]['output']
+            if stage in stages:
+                print(f"🔸 {stage.title()} unchanged, skipped")
+            continue
+
+        if spec.get('done_by') in timings:
+            print(f"🔸 {stage.title()} already done by {spec['done_by']}, skipped")
+            output_fingerprints[stage] = fingerprint
+            if artifacts_dir:
+                manifest[stage] = {'input': fingerprint, 'output': fingerprint, 'seconds': 0}
+                write_manifest(artifacts_dir, manifest)
+            continue
+
+        print(f"🔸 {stage.title()}")
+        start = time.perf_counter()
+        result = spec['run']({name: get_output(name) for name in spec['inputs']}, num_records=num_records)
+        timings[stage] = time.perf_counter() - start
+        print(f"{stage.title()} finished in {timings[stage]:.1f}s")
+
+        outputs[stage] = result
+        # Extracted data can change upstream with the same request, so fingerprint its content
+        output_fingerprints[stage] = file_digest(RAW_DATA_FILE) if stage == 'extract' else fingerprint
+        if artifacts_dir:
+            if artifact_path:
+                pd.to_pickle(result, artifact_path)
+            manifest[stage] = {'input': fingerprint, 'output': output_fingerprints[stage],
+                               'seconds': round(timings[stage], 2)}
+            write_manifest(artifacts_dir, manifest)
+
+    print("Stage timings:")
+    for stage, seconds in timings.items():
+        print(f"    {stage:<10} {seconds:8.1f}s")
+    print(f"    {'total':<10} {sum(timings.values()):8.1f}s")
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Chicago food inspections ETL pipeline.")
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=None,
+                        help="Stages to run (default: all). Other stages' outputs are read from --artifacts-dir.")
+    parser.add_argument('--artifacts-dir', default=os.getenv("ARTIFACTS_DIR"),
+                        help="Directory for stage artifacts; unchanged stages are skipped when set.")
+    parser.add_argument('--force', nargs='+', choices=list(STAGES), default=(),
+                        help="Stages to rerun even if unchanged, e.g. '--force extract' to re-pull the API.")
+    parser.add_argument('--num-records', type=int, default=100000)
+    args = parser.parse_args()
+    run_pipeline(args.stages, args.artifacts_dir, args.num_records, tuple(args.force))
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,7 @@ set -e
 
 echo "🔹 Starting ETL process..."
 
-echo "🔸 Step 1: Extract"
-python extract.py
-
-echo "🔸 Step 2: Transform"
-python transform.py
-
-echo "🔸 Step 3: Load"
-python load.py
+# Extract, transform and load run in one process; stage timings are printed at the end
+python pipeline.py "$@"
 
 echo "✅ ETL process completed successfully!"
@@ -1,12 +1,21 @@
 import pandas as pd
+import numpy as np
 import psycopg2
 import seaborn as sns
 import matplotlib.pyplot as plt
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 import plotly.express as px
 import streamlit as st
 import os
+import time
+import uuid
 import pydeck as pdk
+from fast_read import read_sql_copy
+from instrumentation import timed, summarize, write_query_log
+
+run_started = time.perf_counter()
+# Timing records for this rerun, shown in the debug panel at the bottom
+timings = []
 
 st.title("🍽️ Chicago Food Inspections Dashboard")
 st.write("This app helps you explore and visualize food inspection data from the City of Chicago.")
@@ -19,35 +28,89 @@ DB_PARAMS = {
     "host": os.getenv("POSTGRES_HOST"),
     "port": os.getenv("POSTGRES_PORT"),
 }
+# Schema load.py builds every table and view in (DATA_SCHEMA there)
+DATA_SCHEMA = os.getenv("DATA_SCHEMA", "chicago")
 
 
 @st.cache_resource
-def get_db_connection():
-    """Establish a connection to the PostgreSQL database."""
+def get_db_engine():
+    """Create one pooled engine shared by every session and rerun."""
     try:
         engine = create_engine(
             f"postgresql+psycopg2://{DB_PARAMS['user']}:{DB_PARAMS['password']}@"
-            f"{DB_PARAMS['host']}:{DB_PARAMS['port']}/{DB_PARAMS['dbname']}"
+            f"{DB_PARAMS['host']}:{DB_PARAMS['port']}/{DB_PARAMS['dbname']}",
+            pool_size=5,
+            max_overflow=10,
+            pool_pre_ping=True,
+            connect_args={"options": f"-csearch_path={DATA_SCHEMA}"},
         )
-        conn = engine.connect()
-        return conn
+        with engine.connect():
+            pass
+        return engine
     except Exception as e:
         st.error(f"❌ Error connecting to database: {e}")
         return None
 
-conn = get_db_connection()
+engine = get_db_engine()
 
-if conn:
+if engine:
     st.success("✅ Successfully connected to PostgreSQL database!")
 else:
     st.error("❌ Failed to connect. Check your credentials.")
+    st.stop()
+
+
+def get_load_version():
+    """Latest run_id written by load.py; 0 if the database predates the LoadRuns table."""
+    with engine.connect() as conn:
+        if not conn.execute(text("SELECT to_regclass('\"LoadRuns\"') IS NOT NULL")).scalar():
+            return 0
+        return conn.execute(text('SELECT coalesce(max(run_id), 0) FROM "LoadRuns"')).scalar()
+
+# Checked on every rerun (a primary key lookup), so cached results are dropped exactly when new data lands
+with timed(timings, "load version", kind="query"):
+    load_version = get_load_version()
+
+
+# --- Narrow, parameterized queries: each widget fetches only what it displays ---
+# 'copy' reads results through COPY TO STDOUT + Arrow (fast_read.py), 'read_sql' uses pd.read_sql
+READ_METHOD = os.getenv("READ_METHOD", "copy")
 
+# The cached body only runs on a miss, so this run's misses are the calls that reached the database
+cache_misses = []
 
+@st.cache_data(max_entries=256)
+def cached_query(query, params, version):
+    cache_misses.append(query)
+    if READ_METHOD == "copy":
+        try:
+            return read_sql_copy(query, engine, params)
+        except Exception as e:
+            print(f"COPY read failed, falling back to read_sql: {e}")
+    return pd.read_sql(text(query), engine, params=params)
 
-# --- Load joined data ---
-@st.cache_data
-def fetch_data():
-    query = """
+
+def run_query(query, params=None, label="query"):
+    with timed(timings, label, kind="query") as record:
+        misses = len(cache_misses)
+        df = cached_query(query, params, load_version)
+        record["cache"] = "miss" if len(cache_misses) > misses else "hit"
+        record["rows"] = len(df)
+    return df
+
+
+# --- Pre-aggregated views refreshed by load.py ---
+def fetch_aggregate(view_name):
+    return run_query(f"SELECT * FROM {view_name};", label=view_name)
+
+
+BASE_JOIN = """
+    FROM "Inspections" i
+    JOIN "Facility" f ON i.license_id = f.license_id
+    WHERE f.latitude IS NOT NULL AND f.longitude IS NOT NULL
+"""
+
+sample_df = run_query(f"""
     SELECT
         i.inspection_id,
         i.inspection_date,
@@ -62,22 +125,17 @@ def fetch_data():
         f.zip_code,
         f.latitude,
         f.longitude
-    FROM "Inspections" i
-    JOIN "Facility" f ON i.license_id = f.license_id
-    WHERE f.latitude IS NOT NULL AND f.longitude IS NOT NULL;
-    """
-    return pd.read_sql(query, conn)
-
+    {BASE_JOIN}
+    LIMIT 5;
+""", label="sample")
 
-df = fetch_data()
-
-if df.empty:
+if sample_df.empty:
     st.warning("⚠️ No data retrieved. Check your table name.")
     st.stop()
 
 # --- Sample Preview ---
 st.write("### 🔍 Sample of the Data")
-st.dataframe(df.head())
+st.dataframe(sample_df)
 
 # Pie Chart with any categorical column
 """Generate a pie chart for a column selected by the user."""
@@ -85,57 +143,158 @@ st.dataframe(df.head())
 selected_col = st.selectbox("📊 Select column to visualize", ['risk', 'results'])
 
 # Generate and display pie chart
-if selected_col in df.columns:
-    counts = df[selected_col].value_counts()
-    fig = px.pie(
-        counts, 
-        names=counts.index, 
-        values=counts.values, 
-        title=f"Distribution of {selected_col.title()}"
-    )
-    st.plotly_chart(fig, use_container_width=True)
+counts = fetch_aggregate(f"dashboard_{selected_col}_counts")
+if not counts.empty:
+    with timed(timings, "pie chart", kind="render"):
+        fig = px.pie(
+            counts, 
+            names=selected_col, 
+            values='inspection_count', 
+            title=f"Distribution of {selected_col.title()}"
+        )
+        st.plotly_chart(fig, use_container_width=True)
 else:
-    st.warning(f"⚠️ '{selected_col}' column not found in the DataFrame.")
+    st.warning(f"⚠️ No aggregate data found for '{selected_col}'.")
 
 # --- Map of Inspections ---
 st.write("### Facilities organized by Results")
 
-# Create a copy and clean up
-df_map = df.dropna(subset=["latitude", "longitude"]).copy()
-df_map["results"] = df_map["results"].astype(str).str.strip()
-
-def get_color(result):
-    return {
-        "Pass": [0, 200, 0],
-        "Fail": [255, 0, 0],
-        "Out of Business": [0, 0, 0],
-        "No Entry": [169, 169, 169],
-        "Pass w/ Conditions": [255, 255, 0],  
-        "Not Ready": [135, 206, 235],  
-    }.get(result, [100, 100, 255])
-
-# Apply color and filter columns
-df_map["color"] = df_map["results"].apply(get_color)
-
-# Select only columns that pydeck needs
-df_deck = df_map[["dba_name", "results", "risk", "latitude", "longitude", "color"]].copy()
-
-# Convert all types to ensure serialization
-df_deck["latitude"] = df_deck["latitude"].astype(float)
-df_deck["longitude"] = df_deck["longitude"].astype(float)
-df_deck["color"] = df_deck["color"].apply(lambda x: list(map(int, x)))
+RESULT_COLORS = {
+    "Pass": [0, 200, 0],
+    "Fail": [255, 0, 0],
+    "Out of Business": [0, 0, 0],
+    "No Entry": [169, 169, 169],
+    "Pass w/ Conditions": [255, 255, 0],
+    "Not Ready": [135, 206, 235],
+}
+DEFAULT_COLOR = [100, 100, 255]
+
+# Above this many facilities the automatic mode switches from points to grid bins
+MAP_DETAIL_LIMIT = int(os.getenv("MAP_DETAIL_LIMIT", 20000))
+
+# Must match GEO_CELL_SIZE in transform.py, which computes Facility.geo_cell
+GEO_CELL_SIZE = 0.01
+GEO_CELL_COLUMNS = int(round(360 / GEO_CELL_SIZE))
+
+def viewport_bounds(latitude, longitude, zoom):
+    """Approximate (south, west, north, east) of a ~768x450 px map view at this zoom."""
+    lon_span = 360 / 2 ** zoom * 3
+    lat_span = float(lon_span * 0.6 * np.cos(np.radians(latitude)))
+    return latitude - lat_span / 2, longitude - lon_span / 2, latitude + lat_span / 2, longitude + lon_span / 2
+
+def geo_cell_ranges(south, west, north, east):
+    """SQL condition and params matching the geo_cell ranges covering a bounding box, one range per grid row."""
+    first_col = int(np.floor((west + 180) / GEO_CELL_SIZE))
+    last_col = int(np.floor((east + 180) / GEO_CELL_SIZE))
+    first_row = int(np.floor((south + 90) / GEO_CELL_SIZE))
+    last_row = int(np.floor((north + 90) / GEO_CELL_SIZE))
+    conditions, params = [], {}
+    for n, row in enumerate(range(first_row, last_row + 1)):
+        conditions.append(f"f.geo_cell BETWEEN :cell_lo{n} AND :cell_hi{n}")
+        params[f"cell_lo{n}"] = row * GEO_CELL_COLUMNS + first_col
+        params[f"cell_hi{n}"] = row * GEO_CELL_COLUMNS + last_col
+    return "(" + " OR ".join(conditions) + ")", params
+
+def add_result_colors(df_map):
+    """Vectorized color lookup: one r/g/b column each, read by pydeck as [r, g, b]."""
+    results = df_map["results"].astype(str).str.strip()
+    for i, channel in enumerate(["r", "g", "b"]):
+        lookup = {result: color[i] for result, color in RESULT_COLORS.items()}
+        df_map[channel] = results.map(lookup).fillna(DEFAULT_COLOR[i]).astype(int)
+    return df_map
+
+def add_fail_share_colors(df_bins):
+    """Grid bins shade from green (no failures) to red (all failures)."""
+    share = df_bins["fail_share"].astype(float).to_numpy()
+    df_bins["r"] = np.round(255 * share).astype(int)
+    df_bins["g"] = np.round(200 * (1 - share)).astype(int)
+    df_bins["b"] = 0
+    return df_bins
+
+map_stats = run_query("""
+    SELECT avg(latitude) AS latitude, avg(longitude) AS longitude, count(*) AS facilities
+    FROM "Facility"
+    WHERE latitude IS NOT NULL AND longitude IS NOT NULL;
+""", label="map stats").iloc[0]
+
+map_controls = st.columns(2)
+map_mode = map_controls[0].radio("Map mode", ["Auto", "Facilities", "Grid", "Viewport"], horizontal=True)
+map_zoom = map_controls[1].slider("Map zoom", min_value=8, max_value=15, value=10)
+if map_mode == "Auto":
+    map_mode = "Facilities" if map_stats["facilities"] <= MAP_DETAIL_LIMIT else "Grid"
+
+map_center = (float(map_stats["latitude"]), float(map_stats["longitude"]))
+if map_mode == "Viewport":
+    center_cols = st.columns(2)
+    map_center = (
+        center_cols[0].number_input("Center latitude", value=map_center[0], format="%.4f", step=0.01),
+        center_cols[1].number_input("Center longitude", value=map_center[1], format="%.4f", step=0.01),
+    )
+    # Only facilities inside the visible box: an index range scan per grid row on geo_cell,
+    # then an exact coordinate check for the cells on the edge
+    south, west, north, east = viewport_bounds(map_center[0], map_center[1], map_zoom)
+    cell_sql, cell_params = geo_cell_ranges(south, west, north, east)
+    df_deck = run_query(f"""
+        SELECT DISTINCT ON (f.license_id)
+            f.dba_name, i.results, f.risk,
+            f.latitude::float AS latitude, f.longitude::float AS longitude
+        {BASE_JOIN}
+          AND {cell_sql}
+          AND f.latitude BETWEEN :south AND :north
+          AND f.longitude BETWEEN :west AND :east
+        ORDER BY f.license_id, i.inspection_date DESC;
+    """, dict(cell_params, south=south, north=north, west=west, east=east), label="map viewport")
+    with timed(timings, "map colors") as record:
+        df_deck = add_result_colors(df_deck)
+        record["rows"] = len(df_deck)
+    radius = 60
+    tooltip = {"text": "{dba_name}\nLatest result: {results}\nRisk: {risk}"}
+    st.caption(f"{len(df_deck)} facilities in view")
+elif map_mode == "Facilities":
+    # One point per facility, colored by its latest inspection result
+    df_deck = run_query(f"""
+        SELECT DISTINCT ON (f.license_id)
+            f.dba_name, i.results, f.risk,
+            f.latitude::float AS latitude, f.longitude::float AS longitude
+        {BASE_JOIN}
+        ORDER BY f.license_id, i.inspection_date DESC;
+    """, label="map facilities")
+    with timed(timings, "map colors") as record:
+        df_deck = add_result_colors(df_deck)
+        record["rows"] = len(df_deck)
+    radius = 60
+    tooltip = {"text": "{dba_name}\nLatest result: {results}\nRisk: {risk}"}
+else:
+    # Cells halve in size with every zoom level: ~1 km at zoom 10
+    cell = 0.01 * 2 ** (10 - map_zoom)
+    df_deck = run_query(f"""
+        SELECT
+            (floor(f.latitude / :cell) + 0.5) * :cell AS latitude,
+            (floor(f.longitude / :cell) + 0.5) * :cell AS longitude,
+            count(*) AS inspections,
+            avg((i.results = 'Fail')::int) AS fail_share
+        {BASE_JOIN}
+        GROUP BY 1, 2;
+    """, {'cell': cell}, label="map grid")
+    with timed(timings, "map colors") as record:
+        df_deck[["latitude", "longitude"]] = df_deck[["latitude", "longitude"]].astype(float)
+        df_deck = add_fail_share_colors(df_deck)
+        df_deck["fail_pct"] = (100 * df_deck["fail_share"].astype(float)).round(1)
+        record["rows"] = len(df_deck)
+    radius = cell * 111000 / 2
+    tooltip = {"text": "{inspections} inspections\nFailed: {fail_pct}%"}
 
 # Create columns for map and legend
 col1, col2 = st.columns([4, 1])
 
-with col1:
+with col1, timed(timings, "map", kind="render"):
     st.write("### 🗺️ Color-Coded Inspection Map")
     st.pydeck_chart(pdk.Deck(
         map_style="mapbox://styles/mapbox/light-v9",
         initial_view_state=pdk.ViewState(
-            latitude=df_deck["latitude"].mean(),
-            longitude=df_deck["longitude"].mean(),
-            zoom=10,
+            latitude=map_center[0],
+            longitude=map_center[1],
+            zoom=map_zoom,
             pitch=0,
         ),
         layers=[
@@ -143,27 +302,22 @@ with col1:
                 "ScatterplotLayer",
                 data=df_deck,
                 get_position='[longitude, latitude]',
-                get_fill_color='color',
-                get_radius=60,
+                get_fill_color='[r, g, b]',
+                get_radius=radius,
                 pickable=True,
             )
         ],
-        tooltip={"text": "{dba_name}\nResult: {results}\nRisk: {risk}"}
+        tooltip=tooltip
     ))
 
 with col2:
     st.markdown("###  Legend", unsafe_allow_html=True)
-    # Dynamically generate the legend based on unique results
-    color_mapping = {
-        "Pass": [0, 200, 0],
-        "Fail": [255, 0, 0],
-        "Out of Business": [0, 0, 0],
-        "No Entry": [169, 169, 169],
-        "Pass w/ Conditions": [255, 255, 0],
-        "Not Ready": [135, 206, 235],
-    }
-
-    for result, color in color_mapping.items():
+    if map_mode in ("Facilities", "Viewport"):
+        legend = RESULT_COLORS
+    else:
+        legend = {"No failures": [0, 200, 0], "Half failed": [128, 100, 0], "All failed": [255, 0, 0]}
+
+    for result, color in legend.items():
         color_box = f"rgb({color[0]}, {color[1]}, {color[2]})"
         st.markdown(f"""
         <div style="display: flex; align-items: center;">
@@ -172,52 +326,257 @@ with col2:
         </div>
         """, unsafe_allow_html=True)
 
-def get_time_series(df):
-    df = df.copy()
-    df['inspection_date'] = pd.to_datetime(df['inspection_date'])
-    ts = (
-        df.groupby(df['inspection_date'].dt.to_period('M'))
-          .size()
-          .reset_index(name='Count')
-    )
-    # Fix: Convert period to timestamp for Plotly compatibility
-    ts['inspection_date'] = ts['inspection_date'].dt.to_timestamp()
+GRANULARITIES = {"Day": "day", "Week": "week", "Month": "month"}
+
+def get_time_series(granularity, start_date, end_date, breakdown=None):
+    """Read the matching rollup from InspectionRollups, so cost doesn't grow with history length."""
+    group_col = f", {breakdown}" if breakdown else ""
+    ts = run_query(f"""
+        SELECT period_start AS inspection_date{group_col}, sum(inspection_count) AS "Count"
+        FROM "InspectionRollups"
+        -- A week/month starting before start_date still overlaps the range, so compare period starts
+        WHERE granularity = :granularity
+          AND period_start BETWEEN date_trunc(:granularity, CAST(:start_date AS date))::date AND :end_date
+        GROUP BY period_start{group_col}
+        ORDER BY period_start;
+    """, {'granularity': granularity, 'start_date': start_date, 'end_date': end_date}, label="time series")
+    with timed(timings, "time series dates"):
+        ts['inspection_date'] = pd.to_datetime(ts['inspection_date'])
     return ts
 
 with st.expander("📅 View Inspections Over Time", expanded=True):
     st.write("### 📈 Inspections Over Time")
-    df['inspection_date'] = pd.to_datetime(df['inspection_date'])
-    time_df = get_time_series(df)
-
-    fig_time = px.line(time_df, x='inspection_date', y='Count',
-        title="Number of Inspections Over Time",
-        markers=True
-    )
+    rollup_range = run_query("""
+        SELECT min(period_start) AS first_day, max(period_start) AS last_day
+        FROM "InspectionRollups" WHERE granularity = 'day';
+    """, label="time series range").iloc[0]
+
+    if pd.isna(rollup_range["first_day"]):
+        st.warning("No time series data available.")
+    else:
+        ts_cols = st.columns(2)
+        granularity = ts_cols[0].radio("Granularity", list(GRANULARITIES), index=2, horizontal=True)
+        breakdown = ts_cols[1].selectbox("Split by", ["None", "results", "risk"])
+        first_day, last_day = rollup_range["first_day"], rollup_range["last_day"]
+        ts_range = st.slider("Date range", min_value=first_day, max_value=last_day, value=(first_day, last_day))
+
+        time_df = get_time_series(GRANULARITIES[granularity], ts_range[0], ts_range[1],
+                                  None if breakdown == "None" else breakdown)
+
+        with timed(timings, "time series chart", kind="render"):
+            fig_time = px.line(time_df, x='inspection_date', y='Count',
+                color=None if breakdown == "None" else breakdown,
+                title=f"Number of Inspections Over Time (by {granularity.lower()})",
+                markers=True
+            )
 
-    st.plotly_chart(fig_time, use_container_width=True)
+            st.plotly_chart(fig_time, use_container_width=True)
 
 # --- Filter by City ---
 st.write("### 🏙️ Filter by City")
-if df['city'].notna().sum() > 0:
-    city = st.selectbox("Select a City", sorted(df['city'].dropna().unique()))
-    filtered = df[df['city'] == city]
-    st.write(f"Showing {len(filtered)} records in {city}")
-    st.dataframe(filtered[['dba_name', 'inspection_date', 'results', 'risk']])
+
+PAGE_SIZES = [25, 50, 100, 250]
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE", 50))
+
+def build_filters(city, start_date, end_date, risks, results, wards=(), community_areas=()):
+    """Turn the widget values into a SQL condition and its bind parameters."""
+    conditions = ["i.inspection_date BETWEEN :start_date AND :end_date"]
+    params = {'start_date': start_date, 'end_date': end_date}
+    if city:
+        conditions.append("f.city = :city")
+        params['city'] = city
+    if risks:
+        conditions.append("f.risk = ANY(:risks)")
+        params['risks'] = list(risks)
+    if results:
+        conditions.append("i.results = ANY(:results)")
+        params['results'] = list(results)
+    # Area ids come precomputed from the API, so these are indexed lookups on Facility
+    if wards:
+        conditions.append("f.ward = ANY(:wards)")
+        params['wards'] = [int(ward) for ward in wards]
+    if community_areas:
+        conditions.append("f.community_area = ANY(:community_areas)")
+        params['community_areas'] = [int(area) for area in community_areas]
+    return " AND ".join(conditions), params
+
+city_counts = fetch_aggregate("dashboard_city_counts")
+if not city_counts.empty:
+    month_range = pd.to_datetime(fetch_aggregate("dashboard_monthly_counts")["inspection_month"])
+    min_date = month_range.min().date()
+    max_date = (month_range.max() + pd.offsets.MonthEnd(0)).date()
+
+    filter_cols = st.columns(2)
+    city = filter_cols[0].selectbox("Select a City", sorted(city_counts['city']))
+    date_range = filter_cols[1].date_input("Inspection dates", value=(min_date, max_date),
+                                           min_value=min_date, max_value=max_date)
+    risks = filter_cols[0].multiselect("Risk", sorted(fetch_aggregate("dashboard_risk_counts")['risk']))
+    results = filter_cols[1].multiselect("Result", sorted(fetch_aggregate("dashboard_results_counts")['results']))
+    wards = filter_cols[0].multiselect("Ward", sorted(fetch_aggregate("dashboard_ward_counts")['ward']))
+    community_areas = filter_cols[1].multiselect(
+        "Community area", sorted(fetch_aggregate("dashboard_community_area_counts")['community_area'])
+    )
+    page_size = st.selectbox("Rows per page", PAGE_SIZES,
+                             index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE) if DEFAULT_PAGE_SIZE in PAGE_SIZES else 1)
+
+    start_date, end_date = date_range if len(date_range) == 2 else (date_range[0], max_date)
+    where_sql, params = build_filters(city, start_date, end_date, tuple(risks), tuple(results),
+                                      tuple(wards), tuple(community_areas))
+
+    # Keyset pagination: each page starts after the last (inspection_date, inspection_id) of the
+    # previous one, so every page is one indexed range scan however deep the user browses
+    filter_key = (where_sql, tuple(sorted((k, str(v)) for k, v in params.items())), page_size)
+    if st.session_state.get("browse_filters") != filter_key:
+        st.session_state.browse_filters = filter_key
+        st.session_state.browse_cursors = [None]
+    cursor = st.session_state.browse_cursors[-1]
+
+    page_where = where_sql
+    page_params = dict(params, page_limit=page_size + 1)
+    if cursor:
+        page_where += " AND (i.inspection_date, i.inspection_id) < (:cursor_date, :cursor_id)"
+        page_params.update(cursor_date=cursor[0], cursor_id=cursor[1])
+
+    total = run_query(f"SELECT count(*) AS n {BASE_JOIN} AND {where_sql};", params, label="city count")["n"].iloc[0]
+    page = run_query(f"""
+        SELECT i.inspection_id, f.dba_name, i.inspection_date, i.results, f.risk
+        {BASE_JOIN} AND {page_where}
+        ORDER BY i.inspection_date DESC, i.inspection_id DESC
+        LIMIT :page_limit;
+    """, page_params, label="city page")
+    has_next = len(page) > page_size
+    page = page.head(page_size)
+
+    page_number = len(st.session_state.browse_cursors)
+    st.write(f"Showing {total} records in {city} (page {page_number})")
+    st.dataframe(page.drop(columns="inspection_id"))
+
+    nav_cols = st.columns(2)
+    if nav_cols[0].button("⬅️ Previous", disabled=page_number == 1):
+        st.session_state.browse_cursors.pop()
+        st.rerun()
+    if nav_cols[1].button("Next ➡️", disabled=not has_next):
+        last = page.iloc[-1]
+        st.session_state.browse_cursors.append((last["inspection_date"], int(last["inspection_id"])))
+        st.rerun()
 else:
     st.warning("No city data available.")
 
-sunburst_df = df[['risk', 'results', 'inspection_type']].dropna()
-fig = px.sunburst(sunburst_df, path=['risk', 'results','inspection_type'], title="Risk → Result → Inspection Type Breakdown",
-    color='risk',
-        color_discrete_map={
-        'Risk 1 (High)': 'red',
-        'Risk 2 (Medium)': 'orange',
-        'Risk 3 (Low)': 'green'
-    },
+# --- Inspections by area, from the ward/community area views ---
+st.write("### 🏘️ Inspections by Area")
 
-)
-st.plotly_chart(fig, use_container_width=True)
+AREA_VIEWS = {"Ward": ("dashboard_ward_counts", "ward"),
+              "Community area": ("dashboard_community_area_counts", "community_area")}
 
+area_type = st.radio("Area", list(AREA_VIEWS), horizontal=True)
+area_view, area_col = AREA_VIEWS[area_type]
+area_counts = fetch_aggregate(area_view)
+if area_counts.empty:
+    st.info("No area assignments loaded yet.")
+else:
+    with timed(timings, "area chart", kind="render"):
+        area_counts["fail_pct"] = (100 * area_counts["fail_count"] / area_counts["inspection_count"]).round(1)
+        area_counts[area_col] = area_counts[area_col].astype(str)
+        fig_area = px.bar(area_counts.sort_values("inspection_count", ascending=False), x=area_col,
+                          y="inspection_count", color="fail_pct", color_continuous_scale="RdYlGn_r",
+                          labels={area_col: area_type, "inspection_count": "Inspections", "fail_pct": "Failed %"},
+                          title=f"Inspections by {area_type.lower()}")
+        st.plotly_chart(fig_area, use_container_width=True)
+
+# --- Worst offenders, from the per-facility summary maintained by load.py ---
+st.write("### 🚩 Worst Offenders")
+
+OFFENDER_ORDERS = {
+    "Fail rate": "fail_rate DESC, inspection_count DESC",
+    "Consecutive fails": "consecutive_fails DESC, last_inspection_date DESC",
+}
+
+offender_cols = st.columns(3)
+offender_order = offender_cols[0].radio("Rank by", list(OFFENDER_ORDERS), horizontal=True)
+min_inspections = offender_cols[1].number_input("Minimum inspections", min_value=1, value=5)
+offender_limit = offender_cols[2].selectbox("Show", [10, 25, 50, 100], index=1)
+
+# Indexed top-N read: no scan of Inspections, however long each facility's history is
+offenders = run_query(f"""
+    SELECT dba_name, city, risk, inspection_count, fail_count,
+           round(100 * fail_rate, 1) AS fail_pct, consecutive_fails,
+           last_inspection_date, last_result, distinct_violations
+    FROM "FacilitySummary"
+    WHERE inspection_count >= :min_inspections
+    ORDER BY {OFFENDER_ORDERS[offender_order]}
+    LIMIT :limit;
+""", {'min_inspections': int(min_inspections), 'limit': offender_limit}, label="worst offenders")
+if offenders.empty:
+    st.info("No facilities with that many inspections.")
+else:
+    st.dataframe(offenders)
+
+# --- Search violation text ---
+st.write("### 🔎 Search Violations")
+
+# Must match SEARCH_CONFIG in load.py, which builds Inspections.violation_search
+SEARCH_CONFIG = "english"
+SEARCH_LIMIT = 50
+
+def search_violations(terms, limit=SEARCH_LIMIT):
+    """
+    Ranked full-text search through the GIN index on violation_search. Terms use web search
+    syntax ("hand washing", rodent -mice, rodent or insect); excerpts are only built for the returned rows.
+    """
+    return run_query(f"""
+        SELECT hits.inspection_id, f.dba_name, hits.inspection_date, hits.results,
+               round(hits.rank::numeric, 3) AS rank,
+               ts_headline('{SEARCH_CONFIG}', hits.violation_text, hits.query,
+                           'MaxFragments=2, MaxWords=20, MinWords=5') AS excerpt
+        FROM (
+            SELECT i.inspection_id, i.license_id, i.inspection_date, i.results, i.violation_text,
+                   query, ts_rank(i.violation_search, query) AS rank
+            FROM "Inspections" i, websearch_to_tsquery('{SEARCH_CONFIG}', :terms) query
+            WHERE i.violation_search @@ query
+            ORDER BY rank DESC, i.inspection_date DESC
+            LIMIT :limit
+        ) hits
+        JOIN "Facility" f ON hits.license_id = f.license_id
+        ORDER BY hits.rank DESC, hits.inspection_date DESC;
+    """, {'terms': terms, 'limit': limit}, label="violation search")
+
+search_terms = st.text_input("Search violation comments", placeholder='rodent, "hand washing"').strip()
+if search_terms:
+    matches = search_violations(search_terms)
+    if matches.empty:
+        st.info(f"No inspections mention '{search_terms}'.")
+    else:
+        st.write(f"Top {len(matches)} matching inspections")
+        st.dataframe(matches.drop(columns="inspection_id"))
+
+sunburst_df = fetch_aggregate("dashboard_sunburst_counts")
+with timed(timings, "sunburst chart", kind="render"):
+    fig = px.sunburst(sunburst_df, path=['risk', 'results','inspection_type'], values='inspection_count', title="Risk → Result → Inspection Type Breakdown",
+        color='risk',
+            color_discrete_map={
+            'Risk 1 (High)': 'red',
+            'Risk 2 (Medium)': 'orange',
+            'Risk 3 (Low)': 'green'
+        },
+
+    )
+    st.plotly_chart(fig, use_container_width=True)
 
-# --- Optional: Close Connection ---
-conn.close()
\ No newline at end of file
+# --- Debug panel: where this rerun's time went (open with ?debug=1 or DEBUG_PANEL=1) ---
+# QUERY_LOG_TABLE (e.g. DashboardQueryLog) also appends every rerun's records to that table
+QUERY_LOG_TABLE = os.getenv("QUERY_LOG_TABLE", "")
+run_ms = (time.perf_counter() - run_started) * 1000
+
+if QUERY_LOG_TABLE:
+    session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+    write_query_log(engine, QUERY_LOG_TABLE, timings, session_id, load_version)
+
+if st.query_params.get("debug") == "1" or os.getenv("DEBUG_PANEL") == "1":
+    with st.expander("🛠️ Query timings"):
+        steps, totals = summarize(timings)
+        queries = steps[steps["kind"] == "query"]
+        hits = (queries["cache"] == "hit").sum()
+        st.write(f"Rerun took {run_ms:.0f} ms; {hits} of {len(queries)} queries served from cache "
+                 f"(load version {load_version}, read method {READ_METHOD}).")
+        st.dataframe(totals)
+        st.dataframe(steps)
@@ -0,0 +1,48 @@
+import argparse
+import os
+import time
+import pandas as pd
+from sqlalchemy import create_engine, text
+from fast_read import read_sql_copy
+
+# Benchmark pd.read_sql against the COPY + Arrow reader on synthetic result sets shaped like the
+# dashboard's inspection rows. generate_series builds the rows server-side, so no data load is needed.
+# Point POSTGRES_HOST/POSTGRES_PORT at the compose database (localhost:5433 from the host).
+
+BENCH_QUERY = """
+    SELECT
+        g AS inspection_id,
+        date '2010-01-01' + (g % 5500) AS inspection_date,
+        (ARRAY['Pass', 'Fail', 'Pass w/ Conditions', 'No Entry'])[g % 4 + 1] AS results,
+        'Risk ' || (g % 3 + 1) AS risk,
+        'Facility ' || (g % 20000) AS dba_name,
+        (41.6 + (g % 1000) / 2000.0)::numeric AS latitude,
+        (-87.9 + (g % 997) / 2000.0)::numeric AS longitude
+    FROM generate_series(1, :num_rows) AS g
+"""
+
+def time_reader(name, read, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        df = read()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:>9} | {len(df):>9} rows | best of {repeats}: {best:7.2f}s | {len(df) / best:12,.0f} rows/sec")
+    return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare pd.read_sql with the COPY + Arrow reader.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_engine(
+        f"postgresql+psycopg2://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}@"
+        f"{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_NAME')}"
+    )
+    for num_rows in args.rows:
+        params = {'num_rows': num_rows}
+        read_sql = time_reader("read_sql", lambda: pd.read_sql(text(BENCH_QUERY), engine, params=params), args.repeats)
+        copy = time_reader("copy", lambda: read_sql_copy(BENCH_QUERY, engine, params), args.repeats)
+        print(f"{'':>9}   speedup at {num_rows} rows: {read_sql / copy:.1f}x")
@@ -0,0 +1,67 @@
+import os
+import time
+from contextlib import contextmanager
+import pandas as pd
+from sqlalchemy import text
+
+# Per-rerun timing records for the dashboard's debug panel. app.py keeps one list per script run
+# and every query, transform and chart appends a dict: label, kind, duration, rows and cache hit/miss.
+
+LOG_COLUMNS = ["label", "kind", "cache", "rows", "ms"]
+# Query logs live outside the ETL's schema, which every full load replaces
+LOG_SCHEMA = os.getenv("QUERY_LOG_SCHEMA", "dashboard_log")
+
+@contextmanager
+def timed(records, label, kind="transform"):
+    """
+    Times the block and appends its record to records.
+
+    Parameters:
+    - records (list): Timing records of the current run.
+    - label (str): Widget or step name shown in the panel.
+    - kind (str): 'query', 'transform' or 'render'.
+
+    The yielded dict can be updated with 'rows' and 'cache' ('hit'/'miss') inside the block.
+    """
+    record = {"label": label, "kind": kind, "cache": None, "rows": None}
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["ms"] = round((time.perf_counter() - start) * 1000, 1)
+        records.append(record)
+
+def summarize(records):
+    """Records as a frame, slowest first, plus totals per kind."""
+    df = pd.DataFrame(records, columns=LOG_COLUMNS)
+    totals = df.groupby("kind", as_index=False).agg(steps=("label", "size"), ms=("ms", "sum"))
+    return df.sort_values("ms", ascending=False, ignore_index=True), totals
+
+def write_query_log(engine, table_name, records, session_id, load_version, schema=LOG_SCHEMA):
+    """
+    Appends this run's records to schema.table_name, creating both on first use.
+    Failures are printed and ignored so logging can never break the dashboard.
+    """
+    rows = [dict(r, session_id=session_id, load_version=int(load_version)) for r in records]
+    if not rows:
+        return
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS {schema}'))
+            conn.execute(text(f'''
+                CREATE TABLE IF NOT EXISTS {schema}."{table_name}"
+                (
+                    logged_at timestamp with time zone NOT NULL DEFAULT now(),
+                    session_id character varying,
+                    load_version integer,
+                    label character varying,
+                    kind character varying,
+                    cache character varying,
+                    rows integer,
+                    duration_ms double precision
+                )'''))
+            conn.execute(text(f'''
+                INSERT INTO {schema}."{table_name}" (session_id, load_version, label, kind, cache, rows, duration_ms)
+                VALUES (:session_id, :load_version, :label, :kind, :cache, :rows, :ms)'''), rows)
+    except Exception as e:
+        print(f"Failed to write query log to {table_name}: {e}")
@@ -0,0 +1,131 @@
+import argparse
+import multiprocessing
+import os
+import resource
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+from streamlit.testing.v1 import AppTest
+from instrumentation import LOG_SCHEMA
+
+# Headless load test: runs N dashboard sessions concurrently, one AppTest per process (AppTest keeps
+# process-global runtime state, so sessions can't share a process), each clicking through the same
+# widget interactions, and reports render times, database queries and memory per session.
+# Every process has its own st.cache_data, so each session starts with a cold cache: the worst case,
+# as right after a load. Point POSTGRES_HOST/POSTGRES_PORT at a loaded database
+# (localhost:5433 for the compose one) and run from the streamlit/ directory.
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+LOG_TABLE = "DashboardLoadTest"
+
+# (step name, widget type, widget label, value); a None value clicks a button
+INTERACTIONS = [
+    ("pie column", "selectbox", "📊 Select column to visualize", "results"),
+    ("map grid", "radio", "Map mode", "Grid"),
+    ("map facilities", "radio", "Map mode", "Facilities"),
+    ("weekly series", "radio", "Granularity", "Week"),
+    ("split by result", "selectbox", "Split by", "results"),
+    ("next page", "button", "Next ➡️", None),
+]
+
+def find_widget(at, widget_type, label):
+    for widget in getattr(at, widget_type):
+        if widget.label == label:
+            return widget
+    return None
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_session(timeout):
+    """
+    Runs one session through INTERACTIONS in the current process. Returns its session_id,
+    a (step, seconds) list, and the process's peak RSS in MB before and after the session.
+    Steps whose widget is missing or disabled (e.g. no next page) are skipped.
+    """
+    rss_before = peak_rss_mb()
+    at = AppTest.from_file(APP_FILE, default_timeout=timeout)
+    start = time.perf_counter()
+    at.run()
+    steps = [("initial", time.perf_counter() - start)]
+    if at.exception:
+        raise RuntimeError(f"App raised: {at.exception[0].message}")
+
+    for name, widget_type, label, value in INTERACTIONS:
+        widget = find_widget(at, widget_type, label)
+        if widget is None or getattr(widget, "disabled", False):
+            continue
+        start = time.perf_counter()
+        (widget.click() if value is None else widget.set_value(value)).run()
+        steps.append((name, time.perf_counter() - start))
+    return at.session_state["session_id"], steps, rss_before, peak_rss_mb()
+
+def query_counts(engine, session_ids):
+    """Database round trips per session, from the records app.py wrote to LOG_TABLE."""
+    with engine.connect() as conn:
+        df = pd.read_sql(text(f'''
+            SELECT session_id,
+                   count(*) FILTER (WHERE cache IS DISTINCT FROM 'hit') AS db_queries,
+                   count(*) FILTER (WHERE cache = 'hit') AS cache_hits
+            FROM {LOG_SCHEMA}."{LOG_TABLE}"
+            WHERE kind = 'query' AND session_id = ANY(:ids)
+            GROUP BY session_id'''), conn, params={'ids': list(session_ids)})
+        conn.execute(text(f'DELETE FROM {LOG_SCHEMA}."{LOG_TABLE}" WHERE session_id = ANY(:ids)'), {'ids': list(session_ids)})
+        conn.commit()
+    return df
+
+def run_load_test(sessions, timeout=60):
+    """
+    Runs sessions concurrent dashboard sessions, each in a fresh process, and prints a report.
+
+    Parameters:
+    - sessions (int): Number of concurrent sessions.
+    - timeout (int): Seconds a single rerun may take before AppTest gives up.
+    """
+    # spawn gives every session a clean interpreter; maxtasksperchild=1 keeps one session per process
+    with multiprocessing.get_context("spawn").Pool(processes=sessions, maxtasksperchild=1) as pool:
+        start = time.perf_counter()
+        results = pool.map(run_session, [timeout] * sessions, chunksize=1)
+        elapsed = time.perf_counter() - start
+
+    timings = pd.DataFrame(
+        [(session_id, step, seconds) for session_id, steps, _, _ in results for step, seconds in steps],
+        columns=["session_id", "step", "seconds"],
+    )
+    memory = pd.DataFrame(
+        [(session_id, before, after) for session_id, _, before, after in results],
+        columns=["session_id", "rss_before_mb", "rss_peak_mb"],
+    )
+    per_step = timings.groupby("step", sort=False)["seconds"].describe(percentiles=[0.5, 0.95])
+    print(f"{sessions} concurrent sessions, {len(timings)} reruns in {elapsed:.1f}s")
+    print(f"Render time p50 {np.percentile(timings['seconds'], 50):.2f}s, "
+          f"p95 {np.percentile(timings['seconds'], 95):.2f}s")
+    print(per_step[["count", "50%", "95%", "max"]].round(3).to_string())
+
+    engine = create_engine(
+        f"postgresql+psycopg2://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}@"
+        f"{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_NAME')}"
+    )
+    counts = query_counts(engine, timings["session_id"].unique())
+    engine.dispose()
+    print(f"DB queries per session: mean {counts['db_queries'].mean():.1f}, max {counts['db_queries'].max()} "
+          f"(cache hits per session: mean {counts['cache_hits'].mean():.1f})")
+    # Growth is what the session itself added on top of the imported app and libraries
+    growth = memory["rss_peak_mb"] - memory["rss_before_mb"]
+    print(f"Peak RSS per session: mean {memory['rss_peak_mb'].mean():.0f} MB, max {memory['rss_peak_mb'].max():.0f} MB; "
+          f"growth during the session: mean {growth.mean():.0f} MB, max {growth.max():.0f} MB")
+    return timings, counts, memory
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard sessions.")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 5, 10])
+    parser.add_argument('--timeout', type=int, default=60)
+    args = parser.parse_args()
+
+    # app.py writes each rerun's query records here, which is how queries are counted per session.
+    # Set before the pool starts, so spawned session processes inherit it
+    os.environ["QUERY_LOG_TABLE"] = LOG_TABLE
+    for sessions in args.sessions:
+        run_load_test(sessions, args.timeout)
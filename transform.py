@@ -316,6 +316,45 @@ def clean_lat_long(row):
     else:
         return pd.Series([np.nan, np.nan])
 
+# Grid cell key for viewport queries: ~1.1 km cells numbered row by row from (-90, -180)
+GEO_CELL_SIZE = 0.01
+
+def add_geo_cell(df, cell_size=GEO_CELL_SIZE):
+    """
+    Adds a 'geo_cell' integer key for the grid cell holding each latitude/longitude.
+    Facilities in a bounding box then map to a few contiguous geo_cell ranges per grid row.
+    """
+    columns = int(round(360 / cell_size))
+    lat = pd.to_numeric(df['latitude'], errors='coerce')
+    lon = pd.to_numeric(df['longitude'], errors='coerce')
+    row = np.floor((lat + 90) / cell_size)
+    col = np.floor((lon + 180) / cell_size)
+    df['geo_cell'] = (row * columns + col).astype('Int64')
+    return df
+
+# Socrata's precomputed region assignments (feature ids in the city's boundary datasets)
+COMPUTED_REGIONS = {
+    ':@computed_region_43wa_7qmu': 'ward',
+    ':@computed_region_vrxf_vc4k': 'community_area',
+    ':@computed_region_bdys_3d7i': 'census_tract',
+    ':@computed_region_6mkv_f3dw': 'zip_region',
+    ':@computed_region_awaf_s7ux': 'historical_ward',
+}
+
+def keep_computed_regions(df, regions=COMPUTED_REGIONS):
+    """
+    Renames the known :@computed_region_* columns to area id columns typed as nullable small
+    integers and drops any other computed region columns. A region missing from the batch is
+    added empty so the table schema doesn't depend on which records were fetched.
+    """
+    for source_col, area_col in regions.items():
+        if source_col in df.columns:
+            ids = pd.to_numeric(df[source_col], errors='coerce')
+        else:
+            ids = pd.Series(np.nan, index=df.index)
+        df[area_col] = ids.where(ids.between(-32768, 32767)).round().astype('Int16')
+    return df.drop(columns=[col for col in df.columns if col.startswith(':@computed_region')])
+
 def extract_violation_ids(df, source_col='violations', target_col='violation_ids'):
     def parse_ids(violation_text):
         if pd.isna(violation_text):
@@ -336,9 +375,7 @@ def extract_violation_ids(df, source_col='violations', target_col='violation_ids
     return df
 
 def clean_all(df):
-    columns_to_drop = [col for col in df.columns if col.startswith(':@computed_region')]
-    columns_to_drop.append('location')
-    df = df.drop(columns=columns_to_drop)
+    df = df.drop(columns=['location'])
     df.rename(columns={'zip': 'zip_code'}, inplace=True)
     df.rename(columns={'license_': 'license_id'}, inplace=True)
     df['facility_type'] = df.apply(clean_facility, axis=1)
@@ -357,10 +394,13 @@ def clean_all(df):
     df.loc[df['violations'] == 'unlisted violations', 'violation_ids'] = 'Unlisted violations'
     df = clean_and_deduplicate_licenses(df)
     df = clean_inspectionID(df)
+    # After clean_inspectionID, which rebuilds the frame row by row and would undo the Int16 types
+    df = keep_computed_regions(df)
     df['risk'] = df.apply(clean_risk, axis=1)
     df['zip_code'] = df.apply(clean_zip, axis=1)
     #df['zip_code'] = df['zip_code'].astype(int)
     df[['latitude', 'longitude']] = df.apply(clean_lat_long, axis=1)
+    df = add_geo_cell(df)
     df.loc[df['city'] == 'chicago', 'state'] = 'IL'
     df['inspection_date'] = pd.to_datetime(df['inspection_date']).dt.date
     df = df.drop_duplicates()